@@ -1,5 +1,4 @@
 import asyncio
-import io
 from abc import ABC, abstractmethod
 from typing import Union, Optional, Callable, Awaitable, Dict, Any, AsyncIterator
 
@@ -9,19 +8,42 @@ class Body(ABC):
     async def read(self, nbytes: Optional[int] = None) -> bytes:
         pass
 
+    def size(self) -> Optional[int]:
+        """
+        Number of bytes left to be read if known in advance.
+        """
+        return None
+
 
 class BodyOf(Body):
+    """
+    Body of a string or bytes.
+    Reading it whole returns the wrapped bytes as is, without copying.
+    """
+
     def __init__(self, s: Union[str, bytes]):
-        self._s: io.BytesIO = io.BytesIO(s if isinstance(s, bytes) else s.encode())
+        self._s: bytes = s if isinstance(s, bytes) else s.encode()
+        self._pos: int = 0
 
     async def read(self, nbytes: Optional[int] = None) -> bytes:
-        return self._s.read1(nbytes)
+        start = self._pos
+        end = len(self._s) if nbytes is None else min(start + nbytes, len(self._s))
+        self._pos = end
+        if start == 0 and end == len(self._s):
+            return self._s
+        return self._s[start:end]
+
+    def size(self) -> Optional[int]:
+        return len(self._s) - self._pos
 
 
 class EmptyBody(Body):
     async def read(self, nbytes: Optional[int] = None) -> bytes:
         return b""
 
+    def size(self) -> Optional[int]:
+        return 0
+
 
 class BodyFromASGI(Body):
     def __init__(self, receive: Callable[[], Awaitable[Dict[str, Any]]]):
@@ -32,11 +54,12 @@ class BodyFromASGI(Body):
 
     async def read(self, nbytes: Optional[int] = None) -> bytes:
         async with self._lock:
-            buff = bytearray(nbytes or 0)
+            buff = bytearray()
             async for chunk in self._chunks(nbytes):
                 buff.extend(chunk)
             if nbytes is not None and len(buff) > nbytes:
                 self._leftover = buff[nbytes:]
+                del buff[nbytes:]
             return bytes(buff)
 
     async def _chunks(self, nbytes: Optional[int]) -> AsyncIterator[bytes]:
@@ -44,6 +67,7 @@ class BodyFromASGI(Body):
         if self._leftover:
             bts = bytes(self._leftover)
             self._leftover = bytearray()
+            bytescount += len(bts)
             yield bts
         while not self._empty and (nbytes is None or nbytes > bytescount):
             message = await self._receive()
@@ -63,11 +87,12 @@ class BodyFromIterable(Body):
 
     async def read(self, nbytes: Optional[int] = None) -> bytes:
         async with self._lock:
-            buff = bytearray(nbytes or 0)
-            async for chunk in self._it:
+            buff = bytearray()
+            async for chunk in self._chunks(nbytes):
                 buff.extend(chunk)
-            if nbytes and len(buff) > nbytes:
+            if nbytes is not None and len(buff) > nbytes:
                 self._leftover = buff[nbytes:]
+                del buff[nbytes:]
             return bytes(buff)
 
     async def _chunks(self, nbytes: Optional[int]) -> AsyncIterator[bytes]:
@@ -75,9 +100,13 @@ class BodyFromIterable(Body):
         if self._leftover:
             bts = bytes(self._leftover)
             self._leftover = bytearray()
+            bytescount += len(bts)
             yield bts
-        async for chunk in self._it:
+        while not self._empty and (nbytes is None or nbytes > bytescount):
+            try:
+                chunk = await self._it.__anext__()
+            except StopAsyncIteration:
+                self._empty = True
+                break
             bytescount += len(chunk)
             yield chunk
-            if nbytes and nbytes > bytescount:
-                break
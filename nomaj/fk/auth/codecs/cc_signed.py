@@ -17,6 +17,6 @@ class CcSigned(Codec):
         length = self._signature.length()
         signature: bytes = bts[-length:]
         raw: bytes = bts[:-length]
-        if signature == self._signature.sign(raw):
+        if self._signature.verify(raw, signature):
             return self._origin.decode(raw)
         return Ok(ANONYMOUS)
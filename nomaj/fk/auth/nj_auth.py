@@ -1,10 +1,17 @@
-from typing import Optional
+from typing import Optional, Dict
 
 from koda import Result, Err
+from nvelope import JSON
 
-from nomaj.fk.auth.identity import Identity, is_anon
+from nomaj.fk.auth.identity import Identity, is_anon, ANONYMOUS
 from nomaj.fk.auth.ps import Pass
-from nomaj.fk.auth.rq_auth import rq_with_auth
+from nomaj.fk.auth.rq_auth import (
+    rq_with_auth,
+    rq_with_identity,
+    AUTH_HEADER,
+    RqAuth,
+)
+from nomaj.misc.tracing import Span, span
 from nomaj.nomaj import Nomaj, Req, Resp
 from nomaj.rq.rq_without_headers import rq_without_headers
 
@@ -12,37 +19,71 @@ from nomaj.rq.rq_without_headers import rq_without_headers
 class NjAuth(Nomaj):
     """
     Authenticating muggle.
+
+    Passes the identity on as ``RqAuth`` request (see ``rq_authenticated``).
+    The identity header sent by the client is always removed.
+
+    :param nm: origin nomaj
+    :param pss: pass to authenticate with
+    :param header: name of the identity header
+    :param compat: whether to encode the identity into the header as well,
+        e.g. for the services the request is proxied to
     """
 
-    def __init__(self, nm: Nomaj, pss: Pass, header: Optional[str] = None):
+    def __init__(
+        self,
+        nm: Nomaj,
+        pss: Pass,
+        header: Optional[str] = None,
+        compat: bool = False,
+    ):
         self._nm: Nomaj = nm
         self._pass: Pass = pss
-        self._header: str = header or self.__class__.__name__
+        self._header: str = header or AUTH_HEADER
+        self._compat: bool = compat
 
     async def respond_to(self, request: Req) -> Result[Resp, Exception]:
-        user: Result[Identity, Exception] = await self._pass.enter(request)
+        sp: Optional[Span] = span("Pass.enter", type=self._pass.__class__.__name__)
+        entered: Optional[Result[Identity, Exception]] = None
+        try:
+            entered = await self._pass.enter(request)
+        finally:
+            if sp is not None:
+                sp.end(entered.val if isinstance(entered, Err) else None)
+        user: Result[Identity, Exception] = entered
         if isinstance(user, Err):
             return user
-        if is_anon(user.val):
+        if self._header in request.headers:
+            request = rq_without_headers(request, [self._header])
+        if not is_anon(user.val):
             return await self.act_identified_on(request, user.val)
-        return await self._nm.respond_to(rq_without_headers(request, [self._header]))
+        if isinstance(request, RqAuth):
+            request = rq_with_identity(request, ANONYMOUS)
+        return await self._nm.respond_to(request)
 
     async def act_identified_on(
         self, request: Req, identity: Identity
     ) -> Result[Resp, Exception]:
-        response = await self._nm.respond_to(
-            rq_with_auth(
+        if self._compat:
+            request = rq_with_auth(
                 identity=identity,
                 header=self._header,
-                rq=rq_without_headers(request, [self._header]),
+                rq=request,
             )
-        )
+        response = await self._nm.respond_to(rq_with_identity(request, identity))
         if isinstance(response, Err):
             return response
-        return await self._pass.exit(
-            response=response.val,
-            identity=identity,
-        )
+        sp: Optional[Span] = span("Pass.exit", type=self._pass.__class__.__name__)
+        exited: Optional[Result[Resp, Exception]] = None
+        try:
+            exited = await self._pass.exit(
+                response=response.val,
+                identity=identity,
+            )
+            return exited
+        finally:
+            if sp is not None:
+                sp.end(exited.val if isinstance(exited, Err) else None)
 
     def meta(self) -> Dict[str, JSON]:
         return {
@@ -50,5 +91,7 @@ class NjAuth(Nomaj):
                 "type": self.__class__.__name__,
                 "pass": self._pass.meta(),
             },
-            "children": [],
+            "children": [
+                self._nm.meta(),
+            ],
         }
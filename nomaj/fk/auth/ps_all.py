@@ -1,5 +1,7 @@
-from typing import List
+import asyncio
+from typing import List, Dict, Set
 
+from nvelope import JSON
 from koda import Result, Err
 
 from nomaj.fk.auth.identity import Identity, ANONYMOUS, is_anon
@@ -8,15 +10,28 @@ from nomaj.nomaj import Req, Resp
 
 
 class PsAll(Pass):
-    def __init__(self, passes: List[Pass], identity: int):
+    """
+    Pass identifying the user only if all of the passes do.
+
+    :param passes: passes to check
+    :param identity: index of the pass which identity to take
+    :param concurrent: whether to start all the passes at once.
+        As soon as one fails the passes after it are cancelled.
+        The failure returned is still the one of the first failed pass in the order.
+    """
+
+    def __init__(self, passes: List[Pass], identity: int, concurrent: bool = False):
         if identity not in range(len(passes)):
             raise ValueError(
                 f"Bad identity index ({identity}) for a list of {len(passes)} passes"
             )
         self._passes: List[Pass] = passes
         self._index: int = identity
+        self._concurrent: bool = concurrent
 
     async def enter(self, request: Req) -> Result[Identity, Exception]:
+        if self._concurrent:
+            return await self._enter_concurrently(request)
         identities: List[Result[Identity, Exception]] = []
         for p in self._passes:
             identity: Result[Identity, Exception] = await p.enter(request)
@@ -25,5 +40,46 @@ class PsAll(Pass):
             identities.append(identity)
         return identities[self._index]
 
+    async def _enter_concurrently(self, request: Req) -> Result[Identity, Exception]:
+        tasks: List["asyncio.Future[Result[Identity, Exception]]"] = [
+            asyncio.ensure_future(p.enter(request)) for p in self._passes
+        ]
+        order: Dict["asyncio.Future[Result[Identity, Exception]]", int] = {
+            t: i for i, t in enumerate(tasks)
+        }
+        try:
+            pending: Set["asyncio.Future[Result[Identity, Exception]]"] = set(tasks)
+            failed: int = len(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    identity = task.result()
+                    if isinstance(identity, Err) or is_anon(identity.val):
+                        failed = min(failed, order[task])
+                if failed < len(tasks):
+                    for task in tasks[failed + 1 :]:
+                        task.cancel()
+                    pending = {t for t in pending if order[t] < failed}
+            if failed < len(tasks):
+                return tasks[failed].result()
+            return tasks[self._index].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            # retrieves the outcomes, so that failures of the cancelled
+            # or unneeded passes are not reported as never retrieved
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
         return await self._passes[self._index].exit(response, identity)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "concurrent": self._concurrent,
+            },
+            "children": [p.meta() for p in self._passes],
+        }
@@ -1,9 +1,20 @@
+import asyncio
 import base64
+import binascii
+import hashlib
+import hmac
+import os
 from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple, Callable
 
-from koda import Result, Ok
-from nomaj.fk.auth.identity import Identity, ANONYMOUS
+from nvelope import JSON
+from koda import Result, Ok, Err
+from nomaj.fk.auth.codecs.cc_plain import CcPlain
+from nomaj.fk.auth.identity import Identity, ANONYMOUS, is_anon
 from nomaj.fk.auth.ps import Pass
+from nomaj.http_exception import HttpException
+from nomaj.misc.pool import BoundedPool, PoolSaturated
+from nomaj.misc.store import Store, StoreLru
 from nomaj.nomaj import Req, Resp
 
 
@@ -13,25 +24,144 @@ class Entry(ABC):
         pass
 
 
+class EnBlocking(Entry):
+    """
+    Entry running a blocking check (e.g. password hash verification)
+    in a thread pool.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[str, str], Result[Identity, Exception]],
+        pool: BoundedPool,
+    ):
+        self._check: Callable[[str, str], Result[Identity, Exception]] = check
+        self._pool: BoundedPool = pool
+
+    async def enter(self, user: str, password: str) -> Result[Identity, Exception]:
+        try:
+            return await self._pool.run(self._check, user, password)
+        except PoolSaturated as e:
+            return Err(HttpException.from_status(503, str(e)))
+
+
 class PsBasic(Pass):
     def __init__(self, realm: str, basic: Entry):
         self._realm: str = realm
         self._entry: Entry = basic
 
     async def enter(self, request: Req) -> Result[Identity, Exception]:
-        identity: Result[Identity, Exception]
-        if (
-            "authorization" not in request.headers
-            or "Basic" not in request.headers["authorization"]
-        ):
-            identity = Ok(ANONYMOUS)
-        else:
-            auth: str = base64.b64decode(
-                request.headers["authorization"].split("Basic")[1].strip()
-            ).decode()
-            user, password = auth.split(":", maxsplit=1)
-            identity = await self._entry.enter(user, password)
+        credentials = basic_credentials(request.headers.get("authorization", ""))
+        if credentials is None:
+            return Ok(ANONYMOUS)
+        return await self._entry.enter(*credentials)
+
+    async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
+        return Ok(response)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "realm": self._realm,
+            }
+        }
+
+
+class PsBasicCached(Pass):
+    """
+    Basic authentication remembering successful verifications.
+
+    Verified identities are cached for ``ttl`` seconds by a keyed hash
+    of the ``Authorization`` header, so repeated requests skip the
+    (usually expensive) entry check. Not more than ``concurrency`` checks run
+    at once, not more than ``queue`` wait for their turn, the rest get 503.
+
+    :param realm: authentication realm
+    :param basic: entry to check the credentials with, e.g. ``EnBlocking``
+    :param ttl: time in seconds a verification is remembered for
+    :param cache: store of verified identities. In-memory LRU by default.
+    :param concurrency: maximum number of concurrent checks
+    :param queue: maximum number of checks waiting for their turn
+    :param secret: key of the cache keys hash. Random by default, which is fine
+        for an in-memory cache; workers sharing a cross-process store
+        (e.g. ``StoreShm``) need the same secret to hit each other's entries.
+    """
+
+    def __init__(
+        self,
+        realm: str,
+        basic: Entry,
+        ttl: float = 300.0,
+        cache: Optional[Store] = None,
+        concurrency: int = 4,
+        queue: int = 64,
+        secret: Optional[bytes] = None,
+    ):
+        self._realm: str = realm
+        self._entry: Entry = basic
+        self._ttl: float = ttl
+        self._cache: Store = cache if cache is not None else StoreLru(1024)
+        self._concurrency: int = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queue: int = queue
+        self._waiting: int = 0
+        self._secret: bytes = secret if secret is not None else os.urandom(32)
+        self._codec: CcPlain = CcPlain()
+
+    async def enter(self, request: Req) -> Result[Identity, Exception]:
+        header: str = request.headers.get("authorization", "")
+        key = hmac.new(self._secret, header.encode(), hashlib.sha256).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            return self._codec.decode(cached)
+        credentials = basic_credentials(header)
+        if credentials is None:
+            return Ok(ANONYMOUS)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        if self._semaphore.locked() and self._waiting >= self._queue:
+            return Err(HttpException.from_status(503, "too many credential checks"))
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            identity = await self._entry.enter(*credentials)
+        finally:
+            self._semaphore.release()
+        if isinstance(identity, Ok) and not is_anon(identity.val):
+            self._cache.put(key, self._codec.encode(identity.val), self._ttl)
         return identity
 
     async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
         return Ok(response)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "realm": self._realm,
+                "ttl": self._ttl,
+            }
+        }
+
+
+def basic_credentials(header: str) -> Optional[Tuple[str, str]]:
+    """
+    User and password of the ``Authorization: Basic ...`` header value.
+
+    :returns: ``None`` if the header is absent or malformed
+    """
+    scheme, _, encoded = header.strip().partition(" ")
+    if scheme.lower() != "basic":
+        return None
+    try:
+        decoded: str = base64.b64decode(encoded.strip(), validate=True).decode()
+    except (ValueError, binascii.Error):
+        return None
+    user, sep, password = decoded.partition(":")
+    if not sep:
+        return None
+    return user, password
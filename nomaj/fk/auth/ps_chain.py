@@ -1,22 +1,61 @@
-from typing import List
+import asyncio
+from typing import List, Dict, Optional
 
+from nvelope import JSON
 from koda import Result, Ok, Err
 from nomaj.fk.auth.identity import Identity, ANONYMOUS, is_anon
 from nomaj.fk.auth.ps import Pass
+from nomaj.misc.tracing import current, span
 from nomaj.nomaj import Req, Resp
 
 
 class PsChain(Pass):
-    def __init__(self, passes: List[Pass]):
+    """
+    Pass of the first of the passes which identifies the user.
+
+    :param passes: passes in the order of priority
+    :param concurrent: whether to start all the passes at once. The result is
+        still the one of the first pass in the order, the rest are cancelled
+        as soon as it's known.
+    """
+
+    def __init__(self, passes: List[Pass], concurrent: bool = False):
         self._passes: List[Pass] = passes
+        self._concurrent: bool = concurrent
 
     async def enter(self, request: Req) -> Result[Identity, Exception]:
+        if self._concurrent:
+            return await self._enter_concurrently(request)
+        traced = current() is not None
         for p in self._passes:
-            identity: Result[Identity, Exception] = await p.enter(request)
-            if isinstance(identity, Err) or is_anon(identity.val):
+            identity: Result[Identity, Exception] = (
+                await _entered_traced(p, request) if traced else await p.enter(request)
+            )
+            if isinstance(identity, Err) or not is_anon(identity.val):
                 return identity
         return Ok(ANONYMOUS)
 
+    async def _enter_concurrently(self, request: Req) -> Result[Identity, Exception]:
+        traced = current() is not None
+        tasks = [
+            asyncio.ensure_future(
+                _entered_traced(p, request) if traced else p.enter(request)
+            )
+            for p in self._passes
+        ]
+        try:
+            for task in tasks:
+                identity: Result[Identity, Exception] = await task
+                if isinstance(identity, Err) or not is_anon(identity.val):
+                    return identity
+            return Ok(ANONYMOUS)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # retrieves the outcomes, so that failures of the cancelled
+            # or unneeded passes are not reported as never retrieved
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
         r: Result[Resp, Exception] = Ok(response)
         for p in self._passes:
@@ -24,3 +63,23 @@ class PsChain(Pass):
                 break
             r = await p.exit(r.val, identity)
         return r
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "concurrent": self._concurrent,
+            },
+            "children": [p.meta() for p in self._passes],
+        }
+
+
+async def _entered_traced(p: Pass, request: Req) -> Result[Identity, Exception]:
+    sp = span("Pass.enter", type=p.__class__.__name__)
+    identity: Optional[Result[Identity, Exception]] = None
+    try:
+        identity = await p.enter(request)
+        return identity
+    finally:
+        if sp is not None:
+            sp.end(identity.val if isinstance(identity, Err) else None)
@@ -1,13 +1,13 @@
-from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict
 
+from nvelope import JSON
 from koda import Result, Ok
 
 from nomaj.fk.auth.codecs.codec import Codec
 from nomaj.fk.auth.identity import Identity, ANONYMOUS, is_anon
 from nomaj.fk.auth.ps import Pass
 from nomaj.misc.cookies import cookies_of
-from nomaj.misc.expires import Date
+from nomaj.misc.expires import ExpiresIn, Expires
 from nomaj.nomaj import Req, Resp
 from nomaj.rs.rs_with_cookie import rs_with_cookie
 
@@ -25,6 +25,7 @@ class PsCookie(Pass):
         self._codec: Codec = codec
         self._name: str = (name or self.__class__.__name__).strip()
         self._days: int = days
+        self._expires: Expires = ExpiresIn(days * 24 * 3600)
 
     async def enter(self, request: Req) -> Result[Identity, Exception]:
         value: Optional[str] = cookies_of(request).get(self._name)
@@ -47,8 +48,15 @@ class PsCookie(Pass):
                 text,
                 "Path=/",
                 "HttpOnly",
-                await Date(
-                    datetime.utcnow() + timedelta(days=self._days),
-                ).print(),
+                await self._expires.print(),
             )
         )
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "name": self._name,
+                "days": self._days,
+            }
+        }
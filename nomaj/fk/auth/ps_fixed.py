@@ -1,3 +1,6 @@
+from typing import Dict
+
+from nvelope import JSON
 from koda import Result, Ok
 from nomaj.fk.auth.identity import Identity
 from nomaj.fk.auth.ps import Pass
@@ -13,3 +16,10 @@ class PsFixed(Pass):
 
     async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
         return Ok(response)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+            }
+        }
@@ -1,3 +1,6 @@
+from typing import Dict
+
+from nvelope import JSON
 from koda import Result, Ok
 from nomaj.fk.auth.identity import Identity, ANONYMOUS
 from nomaj.fk.auth.ps import Pass
@@ -10,3 +13,10 @@ class PsLogout(Pass):
 
     async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
         return Ok(response)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+            }
+        }
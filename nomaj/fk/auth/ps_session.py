@@ -0,0 +1,178 @@
+import dataclasses
+import hashlib
+import secrets
+import time
+from typing import Optional, Dict, Tuple, Callable, TypeVar, Any
+
+from nvelope import JSON
+from koda import Result, Ok, Err
+
+from nomaj.fk.auth.codecs.cc_plain import CcPlain
+from nomaj.fk.auth.codecs.codec import Codec
+from nomaj.fk.auth.identity import Identity, ANONYMOUS, is_anon
+from nomaj.fk.auth.ps import Pass
+from nomaj.http_exception import HttpException
+from nomaj.misc.cookies import cookies_of
+from nomaj.misc.expires import ExpiresIn, Expires, Expired
+from nomaj.misc.pool import BoundedPool, PoolSaturated
+from nomaj.misc.store import Store
+from nomaj.nomaj import Req, Resp
+from nomaj.rs.rs_with_cookie import rs_with_cookie
+
+_T = TypeVar("_T")
+
+# cookie name, session id, last time the session was prolonged,
+# digest of the stored identity
+_Session = Tuple[str, str, float, str]
+
+
+@dataclasses.dataclass(frozen=True)
+class _SessionIdentity(Identity):
+    """
+    Identity restored from a session. The session travels from ``enter``
+    to ``exit`` with it, but is not a property, so it's neither seen
+    by the codecs nor by the other passes.
+    """
+
+    session: Optional[_Session] = dataclasses.field(
+        default=None, compare=False, repr=False
+    )
+
+
+class PsSession(Pass):
+    """
+    Pass via server-side session.
+
+    The cookie only holds a random session id, identities are kept in the store
+    (e.g. ``StoreLru``, ``StoreSqlite`` or ``StoreShm``, optionally behind
+    ``StoreWriteBehind``). A session is written and its cookie is set only when
+    the identity changes. Otherwise the session is prolonged (sliding
+    expiration) at most once per ``refresh`` seconds.
+
+    The store is accessed on the event loop unless a pool is given.
+    That's fine for the in-memory stores (``StoreLru``, ``StoreShm``),
+    ``StoreSqlite`` and the like are to be used with a pool.
+
+    :param store: session storage
+    :param name: cookie name. Default to `PsSession`.
+    :param ttl: session lifetime since the last refresh in seconds. Default to 30 days.
+    :param refresh: minimum interval between session refreshes in seconds.
+        Default to 1/10 of the ttl.
+    :param codec: codec to keep the identities in the store with
+    :param pool: pool to access the store in. A saturated pool results in 503.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        name: Optional[str] = None,
+        ttl: float = 30 * 24 * 3600,
+        refresh: Optional[float] = None,
+        codec: Codec = CcPlain(),
+        pool: Optional[BoundedPool] = None,
+    ):
+        self._store: Store = store
+        self._name: str = (name or self.__class__.__name__).strip()
+        self._ttl: float = ttl
+        self._refresh: float = refresh if refresh is not None else ttl / 10
+        self._codec: Codec = codec
+        self._expires: Expires = ExpiresIn(ttl)
+        self._pool: Optional[BoundedPool] = pool
+
+    async def enter(self, request: Req) -> Result[Identity, Exception]:
+        sid: Optional[str] = cookies_of(request).get(self._name)
+        if not sid:
+            return Ok(ANONYMOUS)
+        try:
+            raw: Optional[bytes] = await self._stored(self._store.get, sid.encode())
+        except PoolSaturated as e:
+            return Err(HttpException.from_status(503, str(e)))
+        if raw is None:
+            return Ok(ANONYMOUS)
+        touched, _, encoded = raw.partition(b"\n")
+        identity = self._codec.decode(encoded)
+        if isinstance(identity, Err):
+            return identity
+        return Ok(
+            _SessionIdentity(
+                identity.val.urn,
+                identity.val.properties,
+                (self._name, sid, float(touched), _digest(encoded)),
+            )
+        )
+
+    async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
+        try:
+            return await self._exited(response, identity)
+        except PoolSaturated as e:
+            return Err(HttpException.from_status(503, str(e)))
+
+    async def _exited(
+        self, response: Resp, identity: Identity
+    ) -> Result[Resp, Exception]:
+        session: Optional[_Session] = (
+            identity.session
+            if isinstance(identity, _SessionIdentity)
+            and identity.session is not None
+            and identity.session[0] == self._name
+            else None
+        )
+        if is_anon(identity):
+            if session is None:
+                return Ok(response)
+            await self._stored(self._store.delete, session[1].encode())
+            return Ok(
+                rs_with_cookie(
+                    response,
+                    self._name,
+                    "",
+                    "Path=/",
+                    "HttpOnly",
+                    await Expired().print(),
+                )
+            )
+        encoded: bytes = self._codec.encode(Identity(identity.urn, identity.properties))
+        now = time.time()
+        if session is not None and session[3] == _digest(encoded):
+            sid = session[1]
+            if now - session[2] < self._refresh:
+                return Ok(response)
+        else:
+            if session is not None:
+                await self._stored(self._store.delete, session[1].encode())
+            sid = secrets.token_urlsafe(32)
+        await self._stored(
+            self._store.put,
+            sid.encode(),
+            b"%d\n" % now + encoded,
+            self._ttl,
+        )
+        return Ok(
+            rs_with_cookie(
+                response,
+                self._name,
+                sid,
+                "Path=/",
+                "HttpOnly",
+                "SameSite=Lax",
+                await self._expires.print(),
+            )
+        )
+
+    async def _stored(self, fn: Callable[..., _T], *args: Any) -> _T:
+        if self._pool is None:
+            return fn(*args)
+        return await self._pool.run(fn, *args)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "name": self._name,
+                "ttl": self._ttl,
+            }
+        }
+
+
+def _digest(encoded: bytes) -> str:
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
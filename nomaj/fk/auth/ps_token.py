@@ -1,15 +1,30 @@
 import base64
+import binascii
 import dataclasses
+import hashlib
 import json
+import secrets
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Tuple, Optional
-
-from nvelope import Obj, string_conv, datetime_timestamp_conv, NvelopeError
+from typing import Tuple, Optional, Dict, Callable, Union
+
+from nvelope import (
+    Obj,
+    string_conv,
+    datetime_timestamp_conv,
+    NvelopeError,
+    JSON,
+    MaybeMissing,
+    Miss,
+    Jst,
+)
 from koda import Result, Err, Ok
 
 from nomaj.fk.auth.identity import Identity, ANONYMOUS
 from nomaj.fk.auth.ps import Pass
+from nomaj.fk.auth.revocations import Revocations
+from nomaj.misc.store import Store
 from nomaj.result import Caught
 from nomaj.rs.rs_with_body import rs_with_body
 from nomaj.rs.rs_with_type import rs_json
@@ -22,10 +37,12 @@ class JwtHeader(Obj):
     _conversion = {
         "alg": string_conv,
         "typ": string_conv,
+        "kid": string_conv,
     }
 
     alg: str
     typ: str = "JWT"
+    kid: MaybeMissing[str] = Miss()
 
 
 @dataclasses.dataclass(frozen=True)
@@ -37,11 +54,21 @@ class JwtPayload(Obj):
         "exp": datetime_timestamp_conv,
         "sub": string_conv,
         "dest": string_conv,
+        "jti": string_conv,
     }
     iat: datetime
     exp: datetime
     sub: str
     dest: str = ""
+    jti: MaybeMissing[str] = Miss()
+
+    def as_json(self) -> JSON:
+        # a missing jti ends up among the undefined claims, which are dumped as is
+        return {
+            key: value
+            for key, value in super(JwtPayload, self).as_json().items()
+            if not isinstance(value, MaybeMissing)
+        }
 
 
 @dataclasses.dataclass(frozen=True)
@@ -72,15 +99,55 @@ class VdIsRefreshToken(Validation):
 
 
 class VdSignature(Validation):
+    """
+    Checks the signature of the received ``header.payload`` segments as is,
+    so the key order of the issuer's JSON doesn't matter.
+    The key is picked by the ``kid`` header if there is one.
+    """
+
     def __init__(self, sign: Signature):
         self._signature: Signature = sign
 
     async def verdict_for(self, token: Jwt) -> Tuple[bool, str]:
-        if token_b64(self._signature, token.header, token.payload) == token.encoded:
+        data, _, signature = token.encoded.rpartition(".")
+        try:
+            received: bytes = b64decode(signature)
+        except (ValueError, binascii.Error):
+            return False, "token signature mismatch"
+        kid = token.header.kid
+        si = self._signature.of_kid(kid.value() if kid.has() else None)
+        if si is None:
+            return False, "unknown token key"
+        if si.verify(data.encode(), received):
             return True, ""
         return False, "token signature mismatch"
 
 
+class VdNotRevoked(Validation):
+    """
+    Checks that the token is not revoked.
+
+    Tokens are identified by their ``jti`` claim or, if there is none,
+    by their signature segment.
+
+    :param revocations: revoked ids or a function returning the current ones,
+        e.g. the last snapshot loaded with ``Revocations.load``, so that
+        they can be reloaded without rebuilding the passes
+    """
+
+    def __init__(self, revocations: Union[Revocations, Callable[[], Revocations]]):
+        self._revocations: Callable[[], Revocations] = (
+            (lambda: revocations)
+            if isinstance(revocations, Revocations)
+            else revocations
+        )
+
+    async def verdict_for(self, token: Jwt) -> Tuple[bool, str]:
+        if self._revocations().is_revoked(token_id(token)):
+            return False, "token revoked"
+        return True, ""
+
+
 class VdExpiration(Validation):
     async def verdict_for(self, token: Jwt) -> Tuple[bool, str]:
         if token.payload.exp < datetime.utcnow():
@@ -106,53 +173,115 @@ class JwtEntry(ABC):
         pass
 
     @abstractmethod
-    def enter(self, raw_token: str) -> Result[Identity, Exception]:
+    async def enter(self, raw_token: str) -> Result[Identity, Exception]:
         pass
 
 
-class JwtEntrySimple:
+class JwtEntrySimple(JwtEntry):
+    """
+    :param signature: token signature
+    :param validation: additional validation
+    :param age: token lifetime in seconds
+    :param cache: store of the claims of verified tokens. Tokens found there
+        (until they expire) skip decoding and the signature check, the other
+        validations are run on their cached claims anyway. Entries are keyed
+        by the signature key, so the store may be shared.
+    :param decoded: number of the most recently used verified tokens kept
+        decoded in memory in front of the cache, so that they skip
+        the decoding of the cached claims too
+    """
+
     def __init__(
         self,
         signature: Signature,
         validation: Optional[Validation] = None,
         age: int = 86400,
+        cache: Optional[Store] = None,
+        decoded: int = 1024,
     ):
         self._signature: Signature = signature
         self._age: int = age
-        self._validation: Validation = VdSequence(
-            VdSignature(signature),
+        self._cache: Optional[Store] = cache
+        self._decoded: "OrderedDict[bytes, Jwt]" = OrderedDict()
+        self._decoded_max: int = decoded
+        self._namespace: bytes = signature.sign(b"nomaj.JwtEntrySimple")
+        self._claims: Validation = VdSequence(
             VdExpiration(),
             *([validation] if validation else []),
         )
+        self._verified: Validation = VdSignature(signature)
 
     def new_token(self, idt: Identity, iat: datetime) -> Jwt:
-        header = JwtHeader(alg=self._signature.name(), typ="JWT")
+        kid = self._signature.kid()
+        header = JwtHeader(
+            alg=self._signature.name(),
+            typ="JWT",
+            kid=Jst(kid) if kid is not None else Miss(),
+        )
         payload = JwtPayload(
             iat=iat,
             exp=iat + timedelta(seconds=self._age),
             sub=idt.urn,
+            jti=Jst(secrets.token_urlsafe(16)),
         )
         return Jwt(header, payload, encoded=token_b64(self._signature, header, payload))
 
     async def enter(self, raw_token: str) -> Result[Identity, Exception]:
+        key: bytes = b""
+        if self._cache is not None:
+            key = hashlib.sha256(self._namespace + raw_token.encode()).digest()
+            decoded = self._decoded.get(key)
+            if decoded is not None:
+                self._decoded.move_to_end(key)
+                return await self._identity(decoded)
+            claims = self._cache.get(key)
+            if claims is not None:
+                header_json, payload_json = json.loads(claims)
+                token = Jwt(
+                    JwtHeader.from_json(header_json),
+                    JwtPayload.from_json(payload_json),
+                    raw_token,
+                )
+                self._remember(key, token)
+                return await self._identity(token)
         try:
             header, payload, signature_bytes = raw_token.split(".")
         except ValueError as e:
             return Err(Caught(e, "JWT format error"))
         try:
             token = Jwt(
-                JwtHeader.from_json(json.loads(base64.urlsafe_b64decode(header))),
-                JwtPayload.from_json(json.loads(base64.urlsafe_b64decode(payload))),
+                JwtHeader.from_json(json.loads(b64decode(header))),
+                JwtPayload.from_json(json.loads(b64decode(payload))),
                 raw_token,
             )
-        except (json.JSONDecodeError, NvelopeError) as e:
+        except (json.JSONDecodeError, NvelopeError, ValueError, binascii.Error) as e:
             return Err(Caught(e, "JWT JSON parsing error"))
-        valid, info = await self._validation.verdict_for(token)
-        return Ok(
-            Identity(token.payload.sub, {"from_token": raw_token})
-            if valid
-            else ANONYMOUS
-        )
+        valid, info = await self._verified.verdict_for(token)
+        if not valid:
+            return Ok(ANONYMOUS)
+        if self._cache is not None:
+            ttl = (token.payload.exp - datetime.utcnow()).total_seconds()
+            if ttl > 0:
+                self._cache.put(
+                    key,
+                    json.dumps(
+                        [token.header.as_json(), token.payload.as_json()]
+                    ).encode(),
+                    ttl,
+                )
+                self._remember(key, token)
+        return await self._identity(token)
+
+    def _remember(self, key: bytes, token: Jwt) -> None:
+        self._decoded[key] = token
+        if len(self._decoded) > self._decoded_max:
+            self._decoded.popitem(last=False)
+
+    async def _identity(self, token: Jwt) -> Result[Identity, Exception]:
+        valid, info = await self._claims.verdict_for(token)
+        if not valid:
+            return Ok(ANONYMOUS)
+        return Ok(Identity(token.payload.sub, {"from_token": token.encoded}))
 
 
 class JwtEntryAccess(JwtEntrySimple):
@@ -161,6 +290,8 @@ class JwtEntryAccess(JwtEntrySimple):
         signature: Signature,
         validation: Optional[Validation] = None,
         age: int = 86400,
+        cache: Optional[Store] = None,
+        decoded: int = 1024,
     ):
         super(JwtEntryAccess, self).__init__(
             signature,
@@ -171,6 +302,8 @@ class JwtEntryAccess(JwtEntrySimple):
             if validation
             else VdIsAccessToken(),
             age,
+            cache,
+            decoded,
         )
 
 
@@ -180,6 +313,8 @@ class JwtEntryRefresh(JwtEntrySimple):
         signature: Signature,
         validation: Optional[Validation] = None,
         age: int = 86400,
+        cache: Optional[Store] = None,
+        decoded: int = 1024,
     ):
         super(JwtEntryRefresh, self).__init__(
             signature,
@@ -190,6 +325,8 @@ class JwtEntryRefresh(JwtEntrySimple):
             if validation
             else VdIsRefreshToken(),
             age,
+            cache,
+            decoded,
         )
 
 
@@ -201,13 +338,21 @@ class PsToken(Pass):
     async def enter(self, request: Req) -> Result[Identity, Exception]:
         for v in request.headers.getall(self._header):
             if v.strip().startswith("Bearer"):
-                return self._entry.enter(v.split("Bearer")[1].strip())
+                return await self._entry.enter(v.split("Bearer")[1].strip())
         return Ok(ANONYMOUS)
 
     async def exit(self, response: Resp, identity: Identity) -> Result[Resp, Exception]:
         token = self._entry.new_token(identity, iat=datetime.utcnow())
         return Ok(rs_json(rs_with_body(response, json.dumps({"jwt": token.encoded}))))
 
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "pass": {
+                "type": self.__class__.__name__,
+                "header": self._header,
+            }
+        }
+
 
 def token_b64(s: Signature, jwt_header: JwtHeader, jwt_payload: JwtPayload) -> str:
     header: bytes = base64.urlsafe_b64encode(
@@ -219,3 +364,20 @@ def token_b64(s: Signature, jwt_header: JwtHeader, jwt_payload: JwtPayload) -> s
     data: bytes = b".".join((header, payload))
     signature = base64.urlsafe_b64encode(s.sign(data))
     return b".".join((data, signature)).decode()
+
+
+def b64decode(segment: str) -> bytes:
+    """
+    Decode base64url segment with or without padding.
+    """
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def token_id(token: Jwt) -> str:
+    """
+    The ``jti`` claim of the token or its signature segment if there's none.
+    """
+    jti: str = token.payload.jti.value() if token.payload.jti.has() else ""
+    if jti:
+        return jti
+    return token.encoded.rpartition(".")[2]
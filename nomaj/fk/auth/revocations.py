@@ -0,0 +1,132 @@
+import hashlib
+import heapq
+import math
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Set, Tuple
+
+_MAGIC = b"NMJREV01"
+_HEADER = struct.Struct("<8sQII")
+
+
+class Revocations:
+    """
+    Compact set of revoked token ids.
+
+    A Bloom filter answers most lookups (the ones for valid tokens) in O(1).
+    Its rare positives are confirmed against the sorted 64-bit hashes of
+    the revoked ids, so there are no false positives in practice.
+    Ids revoked at runtime are kept aside until ``compact`` is called.
+
+    :param capacity: expected number of revoked ids
+    :param error: false positive rate of the filter at full capacity
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error: float = 0.01):
+        bits = max(int(-capacity * math.log(error) / math.log(2) ** 2), 8)
+        self._bits: int = bits
+        self._hashes: int = max(round(bits / capacity * math.log(2)), 1)
+        self._filter: bytearray = bytearray((bits + 7) // 8)
+        self._sorted: "array[int]" = array("Q")
+        self._recent: Set[int] = set()
+
+    @classmethod
+    def of(
+        cls, ids: Iterable[str], capacity: int = 1_000_000, error: float = 0.01
+    ) -> "Revocations":
+        revocations = cls(capacity, error)
+        for i in ids:
+            revocations.revoke(i)
+        revocations.compact()
+        return revocations
+
+    @classmethod
+    def load(cls, path: str) -> "Revocations":
+        """
+        Load the snapshot saved with ``save``.
+        """
+        with open(path, "rb") as f:
+            magic, bits, hashes, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path!r} is not a revocations snapshot")
+            revocations = cls.__new__(cls)
+            revocations._bits = bits
+            revocations._hashes = hashes
+            revocations._filter = bytearray(f.read((bits + 7) // 8))
+            revocations._sorted = array("Q")
+            revocations._sorted.fromfile(f, count)
+            revocations._recent = set()
+        return revocations
+
+    def save(self, path: str) -> None:
+        """
+        Atomically save the snapshot of the filter and the hashes.
+        """
+        self.compact()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self._bits, self._hashes, len(self._sorted)))
+            f.write(self._filter)
+            self._sorted.tofile(f)
+        os.replace(tmp, path)
+
+    def revoke(self, token_id: str) -> None:
+        h, h1, h2 = _hashed(token_id)
+        for i in range(self._hashes):
+            bit = (h1 + i * h2) % self._bits
+            self._filter[bit >> 3] |= 1 << (bit & 7)
+        idx = bisect_left(self._sorted, h)
+        if idx == len(self._sorted) or self._sorted[idx] != h:
+            self._recent.add(h)
+
+    def is_revoked(self, token_id: str) -> bool:
+        h, h1, h2 = _hashed(token_id)
+        for i in range(self._hashes):
+            bit = (h1 + i * h2) % self._bits
+            if not self._filter[bit >> 3] & (1 << (bit & 7)):
+                return False
+        if h in self._recent:
+            return True
+        idx = bisect_left(self._sorted, h)
+        return idx < len(self._sorted) and self._sorted[idx] == h
+
+    def compact(self) -> None:
+        """
+        Merge the ids revoked at runtime into the sorted hashes.
+        """
+        recent = sorted(self._recent)
+        self._recent = set()
+        if not self._sorted:
+            self._sorted = array("Q", recent)
+        elif len(recent) <= 1024:
+            for h in recent:
+                idx = bisect_left(self._sorted, h)
+                if idx == len(self._sorted) or self._sorted[idx] != h:
+                    self._sorted.insert(idx, h)
+        else:
+            merged: "array[int]" = array("Q")
+            for h in heapq.merge(self._sorted, recent):
+                if not merged or merged[-1] != h:
+                    merged.append(h)
+            self._sorted = merged
+
+    def memory(self) -> int:
+        """
+        Approximate memory used in bytes.
+        """
+        return (
+            len(self._filter)
+            + self._sorted.itemsize * len(self._sorted)
+            + len(self._recent) * 64
+        )
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent)
+
+
+def _hashed(token_id: str) -> Tuple[int, int, int]:
+    digest = hashlib.blake2b(token_id.encode(), digest_size=24).digest()
+    h, h1, h2 = struct.unpack("<QQQ", digest)
+    return h, h1, h2 | 1
@@ -1,24 +1,30 @@
 import dataclasses
 from typing import Optional, Union
-from dataclasses import replace
 
 from koda import Result, Ok, Err
 
 from nomaj.fk.auth.codecs.cc_plain import CcPlain
 from nomaj.fk.auth.identity import Identity, ANONYMOUS
-from nomaj.fk.auth.nj_auth import NjAuth
 from nomaj.nomaj import Req
 from nomaj.rq.rq_with_headers import rq_with_headers
 
+AUTH_HEADER = "NjAuth"
+
 
 @dataclasses.dataclass(frozen=True)
 class RqAuth(Req):
     identity: Identity
 
 
-def rq_authenticated(
-    rq: Req, header: str = NjAuth.__name__
-) -> Result[RqAuth, Exception]:
+def rq_authenticated(rq: Req, header: str = AUTH_HEADER) -> Result[RqAuth, Exception]:
+    """
+    Request with the identity of the user.
+
+    The identity is taken from the request itself if it's already ``RqAuth``,
+    otherwise it's decoded from the header (see ``rq_with_auth``).
+    """
+    if isinstance(rq, RqAuth):
+        return Ok(rq)
     val: Optional[str] = rq.headers.getone(header, None)
     if val is None:
         identity = ANONYMOUS
@@ -27,18 +33,27 @@ def rq_authenticated(
         if isinstance(result, Err):
             return result
         identity = result.val
-    return Ok(
-        RqAuth(
-            uri=rq.uri,
-            headers=rq.headers,
-            method=rq.method,
-            body=rq.body,
-            identity=identity,
-        )
+    return Ok(rq_with_identity(rq, identity))
+
+
+def rq_with_identity(rq: Req, identity: Identity) -> RqAuth:
+    if isinstance(rq, RqAuth):
+        return dataclasses.replace(rq, identity=identity)
+    return RqAuth(
+        uri=rq.uri,
+        headers=rq.headers,
+        method=rq.method,
+        body=rq.body,
+        identity=identity,
     )
 
 
 def rq_with_auth(rq: Req, identity: Union[str, Identity], header: str) -> Req:
+    """
+    Request with the identity encoded into the header.
+
+    Meant for passing the identity on to proxied services.
+    """
     encoded = CcPlain().encode(
         Identity(urn=identity) if isinstance(identity, str) else identity
     )
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Union, Iterable, List, Mapping, Dict, Optional
 import hmac
 import hashlib
 
@@ -24,6 +24,47 @@ class Signature(ABC):
         """
         pass
 
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        """
+        Check the signature of the data in constant time.
+
+        :param data: signed data
+        :type data: ``bytes``
+
+        :param signature: signature to check
+        :type signature: ``bytes``
+
+        :rtype: ``bool``
+        """
+        return hmac.compare_digest(self.sign(data), signature)
+
+    def sign_many(self, data: Iterable[bytes]) -> List[bytes]:
+        """
+        Sign a batch of data.
+
+        :rtype: ``List[bytes]``
+        """
+        return [self.sign(d) for d in data]
+
+    def kid(self) -> Optional[str]:
+        """
+        :returns: id of the key signing with (the ``kid`` JWT header), if any
+        :rtype: ``str`` or ``None``
+        """
+        return None
+
+    def of_kid(self, kid: Optional[str]) -> Optional["Signature"]:
+        """
+        Signature to verify the data signed with the key of the given id.
+
+        :param kid: key id, ``None`` if unknown
+        :type kid: ``str`` or ``None``
+
+        :returns: the signature or ``None`` if there's no such key
+        :rtype: ``Signature`` or ``None``
+        """
+        return self
+
     @abstractmethod
     def name(self) -> str:
         """
@@ -62,12 +103,83 @@ class SiHmac(Signature):
         assert bits in self._algorithm
         self._key: bytes = key if isinstance(key, bytes) else key.encode()
         self._bits: int = bits
+        self._keyed: "hmac.HMAC" = hmac.new(self._key, digestmod=self._algorithm[bits])
 
     def sign(self, data: bytes) -> bytes:
-        return hmac.new(self._key, data, self._algorithm[self._bits]).digest()
+        h = self._keyed.copy()
+        h.update(data)
+        return h.digest()
+
+    def sign_many(self, data: Iterable[bytes]) -> List[bytes]:
+        keyed = self._keyed
+        signatures: List[bytes] = []
+        for d in data:
+            h = keyed.copy()
+            h.update(d)
+            signatures.append(h.digest())
+        return signatures
 
     def name(self) -> str:
         return f"HS{self._bits}"
 
     def length(self) -> int:
         return int(self._bits / 8)
+
+
+class SiRotating(Signature):
+    """
+    HMAC signature supporting key rotation.
+
+    Signs with the current key. The signature itself is a plain HMAC,
+    the id of the key goes to the ``kid`` JWT header, so verification
+    of tokens picks the right key right away (see ``of_kid``).
+    Data without the key id is checked against all the keys, the current first.
+    Retired keys are kept for verification only.
+
+    :param keys: keys by their ids
+    :type keys: ``Mapping[str, bytes or str]``
+
+    :param current: id of the key to sign with
+    :type current: ``str``
+
+    :param bits: bit length of the SHA function (256, 384 or 512). Defaults to 256
+    :type bits: ``int``
+    """
+
+    def __init__(
+        self, keys: Mapping[str, Union[bytes, str]], current: str, bits: int = 256
+    ):
+        self._signatures: Dict[str, SiHmac] = {
+            kid: SiHmac(key, bits) for kid, key in keys.items()
+        }
+        self._current: str = current
+        self._origin: SiHmac = self._signatures[current]
+
+    def sign(self, data: bytes) -> bytes:
+        return self._origin.sign(data)
+
+    def sign_many(self, data: Iterable[bytes]) -> List[bytes]:
+        return self._origin.sign_many(data)
+
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        if self._origin.verify(data, signature):
+            return True
+        return any(
+            si.verify(data, signature)
+            for kid, si in self._signatures.items()
+            if kid != self._current
+        )
+
+    def kid(self) -> Optional[str]:
+        return self._current
+
+    def of_kid(self, kid: Optional[str]) -> Optional[Signature]:
+        if kid is None:
+            return self
+        return self._signatures.get(kid)
+
+    def name(self) -> str:
+        return self._origin.name()
+
+    def length(self) -> int:
+        return self._origin.length()
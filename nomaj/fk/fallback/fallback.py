@@ -1,17 +1,17 @@
 import dataclasses
 import logging
+import time
 from logging import Logger
-from typing import Optional, Dict
-import http.client
+from typing import Optional, Dict, Tuple, List
 from abc import ABC, abstractmethod
 
 from koda import Result, Ok, Err
 from nvelope import JSON
 
 from nomaj.http_exception import HttpException
+from nomaj.misc.tracing import Span, span
 from nomaj.nomaj import Req, Resp, Nomaj
-from nomaj.rs.rs_text import rs_text
-from nomaj.rs.rs_with_status import rs_with_status
+from nomaj.rs.rs_status import rs_status_text
 
 
 @dataclasses.dataclass(frozen=True)
@@ -44,7 +44,14 @@ class NjFallback(Nomaj):
                 code = err.response.status
             else:
                 code = 500
-            fb_resp = await self._fb.route(ReqFallback(request, err, code))
+            sp: Optional[Span] = span("Fallback.route", status=code)
+            routed: Optional[Result[Optional[Resp], Exception]] = None
+            try:
+                routed = await self._fb.route(ReqFallback(request, err, code))
+            finally:
+                if sp is not None:
+                    sp.end(routed.val if isinstance(routed, Err) else None)
+            fb_resp: Result[Optional[Resp], Exception] = routed
             if not isinstance(fb_resp, Err) and fb_resp.val:
                 resp = Ok(fb_resp.val)
         return resp
@@ -58,12 +65,7 @@ class NjFallback(Nomaj):
 
 class FbStatus(Fallback):
     async def route(self, req: ReqFallback) -> Result[Optional[Resp], Exception]:
-        t = http.client.responses[req.suggested_code]
-        return Ok(
-            rs_text(
-                f"{req.suggested_code} {t}", response=rs_with_status(req.suggested_code)
-            )
-        )
+        return Ok(rs_status_text(req.suggested_code))
 
     def meta(self) -> Dict[str, JSON]:
         return {
@@ -74,27 +76,102 @@ class FbStatus(Fallback):
 
 
 class FbLog(Fallback):
+    """
+    Logs the errors handled by the given fallback.
+
+    Records are built only if the logger is enabled for the level and
+    are formatted lazily, so that they can be written by a background thread
+    (see ``nomaj.misc.log_queue.LogQueue``).
+    Identical errors (same type, message and status) repeated within
+    ``window`` seconds are logged once, the next record after the window
+    tells how many were suppressed.
+
+    :param fb: fallback handling the errors
+    :param logger: logger to write to
+    :param level: logging level of the records
+    :param window: time in seconds identical errors are deduplicated within.
+        Zero disables deduplication.
+    :param max_errors: maximum number of distinct errors remembered
+        for deduplication. The ones out of the window are forgotten first,
+        then the oldest.
+    """
+
     def __init__(
         self,
         fb: Fallback,
         logger: Logger = logging.getLogger(__name__),
         level: int = logging.ERROR,
+        window: float = 10.0,
+        max_errors: int = 1024,
     ):
         self._logger: Logger = logger
         self._level: int = level
         self._fb: Fallback = fb
+        self._window: float = window
+        self._max_errors: int = max_errors
+        self._seen: Dict[Tuple[str, str, int], List[float]] = {}
 
     async def route(self, req: ReqFallback) -> Result[Optional[Resp], Exception]:
         resp = await self._fb.route(req)
+        if not self._logger.isEnabledFor(self._level):
+            return resp
+        suppressed = self._suppressed(req)
+        if suppressed is None:
+            return resp
+        if isinstance(resp, Err):
+            result = f"error {resp.val!r}"
+        elif resp.val is None:
+            result = "no response"
+        else:
+            result = f"status {resp.val.status}"
         self._logger.log(
             self._level,
-            f"Handled error: {req.err!r} caused by {req.req!r}. Result: {resp!r}",
+            "Handled error: %r (status %d) caused by %s %s. Result: %s.%s",
+            req.err,
+            req.suggested_code,
+            req.req.method,
+            req.req.uri.path,
+            result,
+            f" Suppressed {suppressed} identical errors." if suppressed else "",
+            extra={
+                "nomaj_error": req.err,
+                "nomaj_status": req.suggested_code,
+                "nomaj_method": req.req.method,
+                "nomaj_path": req.req.uri.path,
+                "nomaj_suppressed": suppressed,
+            },
         )
         return resp
 
+    def _suppressed(self, req: ReqFallback) -> Optional[int]:
+        """
+        Number of identical errors suppressed since the last logged one
+        or ``None`` if this one is to be suppressed too.
+        """
+        if self._window <= 0:
+            return 0
+        now = time.monotonic()
+        key = (type(req.err).__qualname__, str(req.err), req.suggested_code)
+        seen = self._seen.get(key)
+        if seen is not None and now - seen[0] < self._window:
+            seen[1] += 1
+            return None
+        self._seen.pop(key, None)
+        self._seen[key] = [now, 0]
+        if len(self._seen) > self._max_errors:
+            self._seen = {
+                k: v for k, v in self._seen.items() if now - v[0] < self._window
+            }
+            while len(self._seen) > self._max_errors:
+                del self._seen[next(iter(self._seen))]
+        return int(seen[1]) if seen is not None else 0
+
     def meta(self) -> Dict[str, JSON]:
         return {
             "fallback": {
                 "type": self.__class__.__name__,
+                "level": logging.getLevelName(self._level),
+                "window": self._window,
+                "fallback": self._fb.meta(),
             }
         }
@@ -1,12 +1,13 @@
 from typing import Tuple, Optional, Dict
 
-from koda import Result, Err
+from koda import Result, Err, Ok
 from nvelope import JSON
 
 from nomaj.fork import Fork
 from nomaj.http_exception import HttpException
+from nomaj.misc.tracing import Span, span, responded_traced
 from nomaj.nomaj import Nomaj, Req, Resp
-from nomaj.rs.rs_with_status import rs_with_status
+from nomaj.rs.rs_status import rs_status
 
 
 class NjFork(Nomaj):
@@ -14,13 +15,28 @@ class NjFork(Nomaj):
         self._forks: Tuple[Fork, ...] = forks
 
     async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        sp: Optional[Span] = span("NjFork.route")
+        routed: Optional[Result[Optional[Nomaj], Exception]] = None
+        try:
+            routed = self._routed(request)
+        finally:
+            if sp is not None:
+                sp.end(routed.val if isinstance(routed, Err) else None)
+        nj: Result[Optional[Nomaj], Exception] = routed
+        if isinstance(nj, Err):
+            return nj
+        if nj.val is None:
+            return Err(HttpException(rs_status(404)))
+        if sp is None:
+            return await nj.val.respond_to(request)
+        return await responded_traced(nj.val, request)
+
+    def _routed(self, request: Req) -> Result[Optional[Nomaj], Exception]:
         for fork in self._forks:
             nj: Result[Optional[Nomaj], Exception] = fork.route(request)
-            if isinstance(nj, Err):
+            if isinstance(nj, Err) or nj.val is not None:
                 return nj
-            if nj.val is not None:
-                return await nj.val.respond_to(request)
-        return Err(HttpException(rs_with_status(404)))
+        return Ok(None)
 
     def meta(self) -> Dict[str, JSON]:
         return {
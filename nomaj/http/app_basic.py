@@ -1,16 +1,38 @@
-from urllib.parse import urlparse
+from typing import List, Tuple, Optional
+from urllib.parse import ParseResult
 
 from multidict import CIMultiDict, CIMultiDictProxy
 from koda import Result, Err
 
 from nomaj.http_exception import HttpException
+from nomaj.misc.tracing import Tracer, Span
 from nomaj.nomaj import Nomaj, Req, Resp
-from nomaj.body import EmptyBody, BodyFromASGI
+from nomaj.body import BodyFromASGI
+from nomaj.rs.rs_status import rs_status, asgi_headers
 
 
 class AppBasic:
-    def __init__(self, nomaj: Nomaj):
+    """
+    ASGI app serving a nomaj.
+
+    Responses with a body of known size get ``Content-Length`` automatically
+    (unless the nomaj has set it). Bodies of unknown size are streamed
+    in chunks of ``chunk`` bytes, so the server sends them chunked.
+    Responses to HEAD requests carry the length but no body.
+
+    :param nomaj: nomaj to serve
+    :param chunk: maximum size of a streamed body chunk in bytes
+    :param tracer: tracer to trace the requests with. A traced request
+        gets a span current while it's handled and the response gets
+        ``traceresponse`` header. Not traced by default.
+    """
+
+    def __init__(
+        self, nomaj: Nomaj, chunk: int = 64 * 1024, tracer: Optional[Tracer] = None
+    ):
         self._nomaj: Nomaj = nomaj
+        self._chunk: int = chunk
+        self._tracer: Optional[Tracer] = tracer
 
     async def __call__(self, scope, receive, send):
         if scope["type"] == "lifespan":
@@ -22,49 +44,98 @@ class AppBasic:
                     await send({"type": "lifespan.shutdown.complete"})
                     return
         elif scope["type"] == "http":
-            maybe_resp: Result[Resp, Exception] = await self._nomaj.respond_to(
-                Req(
-                    uri=urlparse(scope["path"]),
-                    method=scope["method"],
-                    headers=CIMultiDictProxy(
-                        CIMultiDict(
-                            [(k.decode(), v.decode()) for k, v in scope["headers"]]
-                        )
-                    ),
-                    body=BodyFromASGI(receive),
+            request = Req(
+                uri=ParseResult(
+                    "",
+                    "",
+                    scope["path"],
+                    "",
+                    scope.get("query_string", b"").decode(),
+                    "",
+                ),
+                method=scope["method"],
+                headers=CIMultiDictProxy(
+                    CIMultiDict([(k.decode(), v.decode()) for k, v in scope["headers"]])
+                ),
+                body=BodyFromASGI(receive),
+            )
+            root: Optional[Span] = (
+                self._tracer.root(
+                    scope["method"],
+                    request.headers.get("traceparent"),
+                    path=scope["path"],
                 )
+                if self._tracer is not None
+                else None
             )
-            if isinstance(maybe_resp, Err):
-                err = maybe_resp.val
-                resp = (
-                    err.response
-                    if isinstance(err, HttpException)
-                    else Resp(
-                        status=500,
-                        headers=CIMultiDict(),
-                        body=EmptyBody(),
-                    )
+            err: Optional[Exception] = None
+            try:
+                maybe_resp: Result[Resp, Exception] = await self._nomaj.respond_to(
+                    request
                 )
-            else:
-                resp = maybe_resp.val
-            await _respond(resp, send)
+                if isinstance(maybe_resp, Err):
+                    err = maybe_resp.val
+                    resp = (
+                        err.response
+                        if isinstance(err, HttpException)
+                        else rs_status(500)
+                    )
+                else:
+                    resp = maybe_resp.val
+                await _respond(resp, send, scope["method"] == "HEAD", self._chunk, root)
+            except Exception as e:
+                err = e
+                raise
+            finally:
+                if root is not None:
+                    root.end(err)
 
 
-async def _respond(response: Resp, send):
+async def _respond(
+    response: Resp, send, head: bool, chunk: int, trace: Optional[Span] = None
+):
+    size: Optional[int] = response.body.size()
+    headers: Optional[List[Tuple[bytes, bytes]]] = asgi_headers(response, size)
+    if headers is None:
+        headers = _encoded_headers(response, size)
+    if trace is not None:
+        trace.set("http.status_code", response.status)
+        headers.append((b"traceresponse", trace.traceparent().encode()))
     await send(
         {
             "type": "http.response.start",
             "status": response.status,
-            "headers": [
-                (name.encode(), value.encode())
-                for name, value in response.headers.items()
-            ],
-        }
-    )
-    await send(
-        {
-            "type": "http.response.body",
-            "body": await response.body.read(),
-            "more_body": False,
+            "headers": headers,
         }
     )
+    if head:
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    elif size is not None:
+        await send(
+            {
+                "type": "http.response.body",
+                "body": await response.body.read(),
+                "more_body": False,
+            }
+        )
+    else:
+        while True:
+            bts: bytes = await response.body.read(chunk)
+            if not bts:
+                break
+            await send({"type": "http.response.body", "body": bts, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _encoded_headers(response: Resp, size: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    headers: List[Tuple[bytes, bytes]] = [
+        (name.encode(), value.encode()) for name, value in response.headers.items()
+    ]
+    if (
+        size is not None
+        and response.status >= 200
+        and response.status not in (204, 304)
+        and "content-length" not in response.headers
+    ):
+        headers.append((b"content-length", str(size).encode()))
+    return headers
@@ -1,18 +1,54 @@
 import asyncio
 
 from nomaj.http.app import App
+from nomaj.misc.deadline import deadline_in
 
 
 class AppTimeable:
+    """
+    App bounded in time.
+
+    Sets the request deadline which inner layers may query
+    via ``nomaj.misc.deadline`` and tighten with ``NjDeadline``.
+    Responds with 504 if the app didn't start responding in time.
+    """
+
     def __init__(self, app: App, timeout: float):
         self._app: App = app
         self._timeout: float = timeout
 
     async def __call__(self, scope, receive, send):
         if scope["type"] == "http":
-            await asyncio.wait_for(
-                self._app(scope, receive, send),
-                timeout=self._timeout,
-            )
+            started = False
+
+            async def tracked_send(message):
+                nonlocal started
+                if message["type"] == "http.response.start":
+                    started = True
+                await send(message)
+
+            with deadline_in(self._timeout):
+                try:
+                    await asyncio.wait_for(
+                        self._app(scope, receive, tracked_send),
+                        timeout=self._timeout,
+                    )
+                except asyncio.TimeoutError:
+                    if started:
+                        raise
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": 504,
+                            "headers": [],
+                        }
+                    )
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": b"",
+                            "more_body": False,
+                        }
+                    )
         else:
             await self._app(scope, receive, send)
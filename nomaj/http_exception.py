@@ -1,20 +1,11 @@
-from multidict import CIMultiDict
-
-from nomaj.body import EmptyBody
 from nomaj.nomaj import Resp
+from nomaj.rs.rs_status import rs_status
 
 
 class HttpException(Exception):
     @classmethod
     def from_status(cls, status: int, *args):
-        return cls(
-            Resp(
-                status=status,
-                headers=CIMultiDict(),
-                body=EmptyBody(),
-            ),
-            *args
-        )
+        return cls(rs_status(status), *args)
 
     def __init__(self, resp: Resp, *args):
         super(HttpException, self).__init__(*args)
@@ -0,0 +1,270 @@
+import dataclasses
+import marshal
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import (
+    Tuple,
+    FrozenSet,
+    Optional,
+    Hashable,
+    Dict,
+    Set,
+    Mapping,
+    Union,
+    List,
+)
+
+from multidict import CIMultiDict, CIMultiDictProxy, MultiMapping
+
+from nomaj.body import BodyOf
+from nomaj.misc.store import Store
+from nomaj.nomaj import Resp
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedResp:
+    """
+    Fully materialized response along with its freshness information.
+    Timestamps are wall clock (``time.time()``) seconds.
+    """
+
+    status: int
+    headers: Tuple[Tuple[str, str], ...]
+    body: bytes
+    stored: float
+    fresh_until: float
+    stale_until: float
+    tags: FrozenSet[str] = frozenset()
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+    def size(self) -> int:
+        return (
+            len(self.body)
+            + sum(len(h) + len(v) for h, v in self.headers)
+            + sum(len(t) for t in self.tags)
+        )
+
+    def as_resp(self, now: float) -> Resp:
+        headers: CIMultiDict[str] = CIMultiDict(self.headers)
+        headers["Age"] = str(max(int(now - self.stored), 0))
+        return Resp(self.status, CIMultiDictProxy(headers), BodyOf(self.body))
+
+
+class Cache(ABC):
+    """
+    Storage of cached responses.
+
+    Entries are addressed by a primary key (identity of the resource)
+    and a variant (values of the headers listed in ``Vary``).
+    """
+
+    @abstractmethod
+    def get(self, primary: Hashable, variant: Hashable) -> Optional[CachedResp]:
+        pass
+
+    @abstractmethod
+    def put(self, primary: Hashable, variant: Hashable, entry: CachedResp) -> None:
+        pass
+
+    @abstractmethod
+    def purge(self, primary: Hashable) -> int:
+        """
+        Remove all the variants of the resource.
+
+        :returns: number of removed entries
+        """
+        pass
+
+    @abstractmethod
+    def purge_tag(self, tag: str) -> int:
+        """
+        Remove all the entries tagged with the tag.
+
+        :returns: number of removed entries
+        """
+        pass
+
+
+class CacheLru(Cache):
+    """
+    In-memory least recently used cache bounded by the total size of entries.
+
+    :param max_bytes: maximum total size of the stored entries
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self._max_bytes: int = max_bytes
+        self._size: int = 0
+        self._entries: "OrderedDict[Tuple[Hashable, Hashable], CachedResp]" = (
+            OrderedDict()
+        )
+        self._variants: Dict[Hashable, Set[Hashable]] = {}
+        self._tags: Dict[str, Set[Tuple[Hashable, Hashable]]] = {}
+
+    def get(self, primary: Hashable, variant: Hashable) -> Optional[CachedResp]:
+        key = (primary, variant)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, primary: Hashable, variant: Hashable, entry: CachedResp) -> None:
+        size = entry.size()
+        if size > self._max_bytes:
+            return
+        key = (primary, variant)
+        self._remove(key)
+        self._entries[key] = entry
+        self._size += size
+        self._variants.setdefault(primary, set()).add(variant)
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self._size > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def purge(self, primary: Hashable) -> int:
+        variants = list(self._variants.get(primary, ()))
+        for variant in variants:
+            self._remove((primary, variant))
+        return len(variants)
+
+    def purge_tag(self, tag: str) -> int:
+        keys = list(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def size(self) -> int:
+        return self._size
+
+    def _remove(self, key: Tuple[Hashable, Hashable]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry.size()
+        primary, variant = key
+        variants = self._variants[primary]
+        variants.discard(variant)
+        if not variants:
+            del self._variants[primary]
+        for tag in entry.tags:
+            tagged = self._tags[tag]
+            tagged.discard(key)
+            if not tagged:
+                del self._tags[tag]
+
+
+class CacheStore(Cache):
+    """
+    Cache kept in a key/value store, e.g. ``StoreShm`` shared by worker processes.
+
+    Every resource and tag has a generation kept in the store, and entries
+    are valid only while the generations they were stored with are current.
+    Purging replaces the generation, so it applies to all the processes
+    at once. Entries are not removed right away, they are left to expire,
+    hence purging reports no removed entries.
+    A generation evicted from the store invalidates its entries too,
+    so eviction never brings purged entries back.
+    """
+
+    def __init__(self, store: Store):
+        self._store: Store = store
+
+    def get(self, primary: Hashable, variant: Hashable) -> Optional[CachedResp]:
+        raw = self._store.get(b"e" + repr((primary, variant)).encode())
+        if raw is None:
+            return None
+        (
+            status,
+            headers,
+            body,
+            stored,
+            fresh_until,
+            stale_until,
+            tags,
+            generations,
+        ) = marshal.loads(raw)
+        for marker, generation in zip(_markers(primary, tags), generations):
+            if self._store.get(marker) != generation:
+                return None
+        return CachedResp(
+            status,
+            tuple(tuple(h) for h in headers),
+            body,
+            stored,
+            fresh_until,
+            stale_until,
+            frozenset(tags),
+        )
+
+    def put(self, primary: Hashable, variant: Hashable, entry: CachedResp) -> None:
+        tags = tuple(entry.tags)
+        self._store.put(
+            b"e" + repr((primary, variant)).encode(),
+            marshal.dumps(
+                (
+                    entry.status,
+                    entry.headers,
+                    entry.body,
+                    entry.stored,
+                    entry.fresh_until,
+                    entry.stale_until,
+                    tags,
+                    tuple(self._generation(m) for m in _markers(primary, tags)),
+                )
+            ),
+            ttl=max(entry.stale_until - now(), 0.0),
+        )
+
+    def purge(self, primary: Hashable) -> int:
+        self._store.delete(_markers(primary, ())[0])
+        return 0
+
+    def purge_tag(self, tag: str) -> int:
+        self._store.delete(b"t" + tag.encode())
+        return 0
+
+    def _generation(self, marker: bytes) -> bytes:
+        generation = self._store.get(marker)
+        if generation is None:
+            generation = os.urandom(8)
+            self._store.put(marker, generation)
+        return generation
+
+
+def _markers(primary: Hashable, tags: Tuple[str, ...]) -> List[bytes]:
+    return [b"p" + repr(primary).encode(), *(b"t" + t.encode() for t in tags)]
+
+
+def cache_control(headers: MultiMapping[str]) -> Mapping[str, Union[str, bool]]:
+    """
+    Parse ``Cache-Control`` directives.
+    Directives without a value are mapped to ``True``.
+    """
+    directives: Dict[str, Union[str, bool]] = {}
+    for header in headers.getall("Cache-Control", []):
+        for directive in header.split(","):
+            name, sep, value = directive.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"') if sep else True
+    return directives
+
+
+def seconds(directive: Union[str, bool, None], default: float) -> float:
+    if isinstance(directive, str):
+        try:
+            return max(float(directive), 0.0)
+        except ValueError:
+            return default
+    return default
+
+
+def now() -> float:
+    return time.time()
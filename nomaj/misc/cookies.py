@@ -1,16 +1,33 @@
+from functools import lru_cache
 from types import MappingProxyType
-from typing import Mapping
+from typing import Mapping, Tuple, Dict
 
 from nomaj.nomaj import Req
 
 
 def cookies_of(request: Req) -> Mapping[str, str]:
-    cookies_map = {}
-    for cookies in request.headers.getall("cookie", []):
-        name: str
-        value: str
+    """
+    Cookies sent with the request.
+
+    Parsing results are cached by the raw ``Cookie`` header values,
+    so every pass and handler looking into the same request parses it once.
+    Values may contain ``=`` and may be quoted. If a cookie is sent twice
+    the first (i.e. the most specific) value is taken. Malformed pairs are skipped.
+    """
+    return _parsed(tuple(request.headers.getall("cookie", ())))
+
+
+@lru_cache(maxsize=512)
+def _parsed(headers: Tuple[str, ...]) -> Mapping[str, str]:
+    cookies_map: Dict[str, str] = {}
+    for cookies in headers:
         for cookie in cookies.split(";"):
-            if cookie.strip():
-                name, value = cookie.strip().split("=")
-                cookies_map[name.strip()] = value.strip()
+            name, sep, value = cookie.partition("=")
+            name = name.strip()
+            if not sep or not name or name in cookies_map:
+                continue
+            value = value.strip()
+            if len(value) > 1 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            cookies_map[name] = value
     return MappingProxyType(cookies_map)
@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Iterator
+
+_deadline: ContextVar[Optional[float]] = ContextVar("nomaj_deadline", default=None)
+
+
+def deadline() -> Optional[float]:
+    """
+    Absolute deadline of the current request in ``time.monotonic()`` terms.
+
+    :returns: the deadline or ``None`` if the request is not time-bounded
+    """
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the deadline of the current request.
+
+    :returns: remaining time (never negative) or ``None`` if there's no deadline
+    """
+    dl = _deadline.get()
+    if dl is None:
+        return None
+    return max(dl - time.monotonic(), 0.0)
+
+
+def expired(cost: float = 0.0) -> bool:
+    """
+    Tells whether the remaining budget is not enough for an operation.
+
+    :param cost: expected duration of the operation in seconds
+    """
+    left = remaining()
+    return left is not None and left <= cost
+
+
+@contextmanager
+def deadline_in(timeout: float) -> Iterator[float]:
+    """
+    Set the deadline of the current context to ``timeout`` seconds from now.
+    An already set deadline may only be tightened, never extended.
+
+    :returns: the effective deadline
+    """
+    dl = time.monotonic() + timeout
+    current = _deadline.get()
+    if current is not None and current < dl:
+        dl = current
+    token = _deadline.set(dl)
+    try:
+        yield dl
+    finally:
+        _deadline.reset(token)
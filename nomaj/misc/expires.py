@@ -1,9 +1,8 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
-from typing import cast
+from datetime import datetime
+from typing import cast, Optional, Any
 
-import babel
-from babel.dates import format_datetime
+from nomaj.misc.http_date import http_date_of, http_date_in, http_date
 
 
 class Expires(ABC):
@@ -21,29 +20,58 @@ class Expires(ABC):
 
 
 class Date(Expires):
+    """
+    Expiration at the given date.
+
+    Formatted as RFC 7231 date with ``Expires=`` prefix by default.
+    Custom ``pattern`` and ``locale`` require ``babel`` to be installed.
+    """
+
     def __init__(
         self,
         expires: datetime,
-        pattern: str = "'Expires='EEE, dd MMM yyyy HH:mm:ss 'GMT'",
-        locale: babel.Locale = babel.Locale("en"),
+        pattern: Optional[str] = None,
+        locale: Optional[Any] = None,
     ):
-        self._pattern: str = pattern
-        self._locale: babel.Locale = locale
+        self._pattern: Optional[str] = pattern
+        self._locale: Optional[Any] = locale
         self._expires: datetime = expires
 
     async def print(self) -> str:
+        if self._pattern is None and self._locale is None:
+            return f"Expires={http_date_of(self._expires)}"
+        import babel
+        from babel.dates import format_datetime
+
         return cast(
-            str, format_datetime(self._expires, self._pattern, locale=self._locale)
+            str,
+            format_datetime(
+                self._expires,
+                self._pattern or "'Expires='EEE, dd MMM yyyy HH:mm:ss 'GMT'",
+                locale=self._locale or babel.Locale("en"),
+            ),
         )
 
 
+class ExpiresIn(Expires):
+    """
+    Expiration in the given number of seconds from the moment of printing.
+    """
+
+    def __init__(self, seconds: float):
+        self._seconds: float = seconds
+
+    async def print(self) -> str:
+        return f"Expires={http_date_in(self._seconds)}"
+
+
 class Never(Expires):
     """
     Never expires.
     """
 
     def __init__(self):
-        self._origin: Expires = Date(datetime.utcnow() + timedelta(weeks=1500))
+        self._origin: Expires = ExpiresIn(1500 * 7 * 24 * 3600)
 
     async def print(self) -> str:
         return await self._origin.print()
@@ -54,8 +82,7 @@ class Expired(Expires):
     Already expired. Returns "0" according to RFC7234.
     """
 
-    def __init__(self):
-        self._origin: Expires = Date(datetime.utcfromtimestamp(0.0))
+    _text: str = f"Expires={http_date(0.0)}"
 
     async def print(self) -> str:
-        return await self._origin.print()
+        return self._text
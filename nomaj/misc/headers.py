@@ -0,0 +1,134 @@
+from typing import (
+    Collection,
+    Tuple,
+    FrozenSet,
+    Optional,
+    Iterator,
+    List,
+    Union,
+    TypeVar,
+    Any,
+)
+
+from multidict import MultiMapping, CIMultiDict, CIMultiDictProxy
+
+_T = TypeVar("_T")
+_MISSING: Any = object()
+
+
+class HeadersLayered(MultiMapping[str]):
+    """
+    Case-insensitive headers recorded as a delta over a shared base.
+
+    Adding or removing headers creates a new layer which shares the base
+    with the previous one and copies only the (small) delta, instead of
+    copying all of the headers. Lookups go through the delta, the flat
+    multidict is only built when the headers are iterated.
+    """
+
+    def __init__(
+        self,
+        base: MultiMapping[str],
+        removed: FrozenSet[str] = frozenset(),
+        added: Tuple[Tuple[str, str], ...] = (),
+    ):
+        self._base: MultiMapping[str] = base
+        self._removed: FrozenSet[str] = removed
+        self._added: Tuple[Tuple[str, str], ...] = added
+        self._flat: Optional[CIMultiDictProxy[str]] = None
+
+    def with_(self, headers: Collection[Tuple[str, str]]) -> "HeadersLayered":
+        return HeadersLayered(self._base, self._removed, self._added + tuple(headers))
+
+    def without(self, names: Collection[str]) -> "HeadersLayered":
+        removed = frozenset(n.lower() for n in names)
+        return HeadersLayered(
+            self._base,
+            self._removed | removed,
+            tuple((h, v) for h, v in self._added if h.lower() not in removed),
+        )
+
+    def getall(self, key: str, default: Union[List[str], _T] = _MISSING) -> Any:
+        lkey = key.lower()
+        values: List[str] = (
+            [] if lkey in self._removed else list(self._base.getall(key, []))
+        )
+        values.extend(v for h, v in self._added if h.lower() == lkey)
+        if values:
+            return values
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def getone(self, key: str, default: Union[str, _T] = _MISSING) -> Any:
+        lkey = key.lower()
+        if lkey not in self._removed:
+            value = self._base.getone(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        for h, v in self._added:
+            if h.lower() == lkey:
+                return v
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def __getitem__(self, key: str) -> str:
+        return self.getone(key)  # type: ignore
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.getone(key, None) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.flat())
+
+    def __len__(self) -> int:
+        return len(self.flat())
+
+    def keys(self):  # type: ignore
+        return self.flat().keys()
+
+    def items(self):  # type: ignore
+        return self.flat().items()
+
+    def values(self):  # type: ignore
+        return self.flat().values()
+
+    def flat(self) -> CIMultiDictProxy[str]:
+        if self._flat is None:
+            if (
+                not self._removed
+                and not self._added
+                and isinstance(self._base, CIMultiDictProxy)
+            ):
+                self._flat = self._base
+            else:
+                flat: CIMultiDict[str] = CIMultiDict(
+                    (h, v)
+                    for h, v in self._base.items()
+                    if h.lower() not in self._removed
+                )
+                flat.extend(self._added)
+                self._flat = CIMultiDictProxy(flat)
+        return self._flat
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({list(self.items())!r})>"
+
+
+def layered(headers: MultiMapping[str]) -> HeadersLayered:
+    if isinstance(headers, HeadersLayered):
+        return headers
+    return HeadersLayered(headers)
+
+
+def headers_with(
+    headers: MultiMapping[str], added: Collection[Tuple[str, str]]
+) -> HeadersLayered:
+    return layered(headers).with_(added)
+
+
+def headers_without(
+    headers: MultiMapping[str], removed: Collection[str]
+) -> HeadersLayered:
+    return layered(headers).without(removed)
@@ -0,0 +1,60 @@
+import calendar
+import time
+from datetime import datetime
+from functools import lru_cache
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = (
+    "",
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+@lru_cache(maxsize=256)
+def _formatted(timestamp: int) -> str:
+    t = time.gmtime(timestamp)
+    return (
+        f"{_DAYS[t.tm_wday]}, {t.tm_mday:02d} {_MONTHS[t.tm_mon]} {t.tm_year:04d} "
+        f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} GMT"
+    )
+
+
+def http_date(timestamp: float) -> str:
+    """
+    RFC 7231 IMF-fixdate, e.g. ``Sun, 06 Nov 1994 08:49:37 GMT``.
+
+    Results are cached per second.
+    """
+    return _formatted(int(timestamp))
+
+
+def http_date_of(dt: datetime) -> str:
+    """
+    HTTP date of the datetime. Naive datetimes are taken as UTC.
+    """
+    return _formatted(calendar.timegm(dt.utctimetuple()))
+
+
+def http_date_now() -> str:
+    """
+    HTTP date of the current second, e.g. for ``Date`` header.
+    """
+    return _formatted(int(time.time()))
+
+
+def http_date_in(seconds: float) -> str:
+    """
+    HTTP date the given number of seconds from now.
+    """
+    return _formatted(int(time.time() + seconds))
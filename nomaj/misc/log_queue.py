@@ -0,0 +1,101 @@
+import logging
+import queue
+from logging import Logger, LogRecord
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, List
+
+
+class LogQueue:
+    """
+    Moves writing of the logger records off the calling thread.
+
+    On start the handlers of the logger are replaced with a handler putting
+    records into a bounded queue, and the original handlers are run by
+    a background thread. If the logger propagates, the handlers of its
+    ancestors it would propagate to are run by the thread as well
+    (the ancestors keep them) and the logger stops propagating until stopped.
+    The message of a record is merged with its arguments on the calling thread,
+    so the arguments may change or go away afterwards. The rest of
+    the formatting is done by the background thread.
+    When the queue is full, records are dropped rather than blocking the caller.
+
+    :param logger: logger whose handlers are to be run in background
+    :param size: maximum number of records waiting to be written
+    """
+
+    def __init__(self, logger: Logger, size: int = 10000):
+        self._logger: Logger = logger
+        self._size: int = size
+        self._handler: Optional[_QueueHandlerLazy] = None
+        self._listener: Optional[QueueListener] = None
+        self._handlers: List[logging.Handler] = []
+        self._propagate: bool = logger.propagate
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        q: "queue.Queue[LogRecord]" = queue.Queue(self._size)
+        self._handlers = list(self._logger.handlers)
+        self._propagate = self._logger.propagate
+        self._handler = _QueueHandlerLazy(q)
+        self._listener = QueueListener(
+            q,
+            *self._handlers,
+            *_propagated_to(self._logger),
+            respect_handler_level=True,
+        )
+        for handler in self._handlers:
+            self._logger.removeHandler(handler)
+        self._logger.addHandler(self._handler)
+        self._logger.propagate = False
+        self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is None or self._handler is None:
+            return
+        self._logger.removeHandler(self._handler)
+        for handler in self._handlers:
+            self._logger.addHandler(handler)
+        self._logger.propagate = self._propagate
+        self._listener.stop()
+        self._listener = None
+        self._handler = None
+
+    def dropped(self) -> int:
+        """
+        Number of records dropped because the queue was full.
+        """
+        return self._handler.dropped if self._handler is not None else 0
+
+
+class _QueueHandlerLazy(QueueHandler):
+    def __init__(self, q: "queue.Queue[LogRecord]"):
+        super().__init__(q)
+        self.dropped: int = 0
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # The records never leave the process, so they are not formatted
+        # here, on the calling thread. Only the message is, as its arguments
+        # may be changed by the caller before the record is written.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _propagated_to(logger: Logger) -> List[logging.Handler]:
+    """
+    Handlers of the ancestors the records of the logger propagate to.
+    """
+    handlers: List[logging.Handler] = []
+    current: Optional[Logger] = logger
+    while current is not None and current.propagate:
+        current = current.parent
+        if current is not None:
+            handlers.extend(current.handlers)
+    return handlers
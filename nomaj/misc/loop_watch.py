@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from logging import Logger
+from typing import Optional
+
+
+class LoopWatch:
+    """
+    Development aid detecting code which blocks the event loop.
+
+    A background thread pings the loop and logs the stack of the loop thread
+    whenever a ping is not handled within the threshold, i.e. some callback
+    (usually an async handler doing blocking work) holds the loop.
+
+    :param threshold: acceptable loop hold time in seconds
+    :param logger: logger to report to
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        logger: Logger = logging.getLogger(__name__),
+    ):
+        self._threshold: float = threshold
+        self._logger: Logger = logger
+        self._stopped: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        loop = loop or asyncio.get_running_loop()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._watch,
+            args=(loop, threading.get_ident()),
+            name=self.__class__.__name__,
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread: int) -> None:
+        while not self._stopped.is_set() and not loop.is_closed():
+            pong = threading.Event()
+            sent = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(pong.set)
+            except RuntimeError:
+                return
+            if not pong.wait(self._threshold):
+                frame = sys._current_frames().get(loop_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame else ""
+                while not pong.wait(self._threshold) and not self._stopped.is_set():
+                    pass
+                self._logger.warning(
+                    "Event loop was blocked for %.3fs (threshold %.3fs) at:\n%s",
+                    time.monotonic() - sent,
+                    self._threshold,
+                    stack,
+                )
+            self._stopped.wait(self._threshold / 2)
@@ -0,0 +1,146 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets.
+
+    Observations are counted in a preallocated array, so recording one
+    is a bisect and an increment.
+
+    :param buckets: ascending upper bounds of the buckets in seconds
+    """
+
+    __slots__ = ("_buckets", "_counts", "sum")
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self._buckets: Tuple[float, ...] = tuple(buckets)
+        self._counts: "array[int]" = array("Q", bytes(8 * (len(self._buckets) + 1)))
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._buckets, value)] += 1
+        self.sum += value
+
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Cumulative counts per upper bound, ``+Inf`` included.
+        """
+        result: List[Tuple[str, int]] = []
+        total = 0
+        for bound, count in zip(self._buckets, self._counts):
+            total += count
+            result.append((repr(bound), total))
+        result.append(("+Inf", total + self._counts[-1]))
+        return result
+
+
+class RouteStats:
+    """
+    Counters of a single node of the nomaj tree.
+    """
+
+    __slots__ = ("route", "kind", "requests", "errors", "latency")
+
+    def __init__(self, route: str, kind: str, buckets: Sequence[float] = BUCKETS):
+        self.route: str = route
+        self.kind: str = kind
+        self.requests: int = 0
+        self.errors: int = 0
+        self.latency: Histogram = Histogram(buckets)
+
+
+class Metrics:
+    """
+    Registry of the route stats of a process.
+
+    :param buckets: latency histogram buckets in seconds
+    :param prefix: prefix of the exported metric names
+    """
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS, prefix: str = "nomaj"):
+        self._buckets: Tuple[float, ...] = tuple(buckets)
+        self._prefix: str = prefix
+        self._routes: Dict[str, RouteStats] = {}
+
+    def route(self, route: str, kind: str) -> RouteStats:
+        """
+        Stats of the route, created on first use.
+
+        :param route: route label
+        :param kind: ``nomaj`` or ``fork``
+        """
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = RouteStats(route, kind, self._buckets)
+            self._routes[route] = stats
+        return stats
+
+    def routes(self) -> List[RouteStats]:
+        return list(self._routes.values())
+
+    def prometheus(self) -> str:
+        """
+        The stats in the Prometheus text exposition format.
+        """
+        p = self._prefix
+        lines: List[str] = [
+            f"# HELP {p}_requests_total Requests handled (nomaj) or matched (fork).",
+            f"# TYPE {p}_requests_total counter",
+        ]
+        for stats in self._routes.values():
+            lines.append(f"{p}_requests_total{{{_labels(stats)}}} {stats.requests}")
+        lines.extend(
+            [
+                f"# HELP {p}_errors_total Requests resulted in Err.",
+                f"# TYPE {p}_errors_total counter",
+            ]
+        )
+        for stats in self._routes.values():
+            lines.append(f"{p}_errors_total{{{_labels(stats)}}} {stats.errors}")
+        lines.extend(
+            [
+                f"# HELP {p}_duration_seconds Time spent in the route.",
+                f"# TYPE {p}_duration_seconds histogram",
+            ]
+        )
+        for stats in self._routes.values():
+            labels = _labels(stats)
+            count = 0
+            for le, count in stats.latency.cumulative():
+                lines.append(
+                    f'{p}_duration_seconds_bucket{{{labels},le="{le}"}} {count}'
+                )
+            lines.append(f"{p}_duration_seconds_sum{{{labels}}} {stats.latency.sum}")
+            lines.append(f"{p}_duration_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(stats: RouteStats) -> str:
+    return f'route="{_escaped(stats.route)}",kind="{stats.kind}"'
+
+
+def _escaped(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
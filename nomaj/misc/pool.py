@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, Future
+from typing import Callable, TypeVar, Dict, Any, Optional, Tuple
+
+from nvelope import JSON
+
+_T = TypeVar("_T")
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class BoundedPool:
+    """
+    Thread pool with a bounded submission queue.
+
+    Calls are run with a copy of the caller's context, so context variables
+    (e.g. the request deadline) are visible in the worker threads.
+
+    :param workers: number of threads
+    :param queue: maximum number of calls waiting for a free thread.
+        Submitting more raises ``PoolSaturated``.
+    :param name: thread name prefix
+    """
+
+    def __init__(self, workers: int = 4, queue: int = 64, name: str = "nomaj"):
+        self._name: str = name
+        self._workers: int = workers
+        self._queue: int = queue
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: int = 0
+        self._completed: int = 0
+        self._rejected: int = 0
+        self._executor: Executor = self._new_executor()
+
+    async def run(self, fn: Callable[..., _T], *args: Any) -> _T:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def submit(self, fn: Callable[..., _T], *args: Any) -> "Future[_T]":
+        """
+        Submit the call without waiting for it.
+
+        :raises PoolSaturated: if the pool is saturated
+        """
+        with self._lock:
+            if self._pending >= self._workers + self._queue:
+                self._rejected += 1
+                raise PoolSaturated(f"Pool {self._name!r} is saturated")
+            self._pending += 1
+        try:
+            fut: "Future[_T]" = self._executor.submit(self._task(fn, *args))
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        fut.add_done_callback(self._done)
+        return fut
+
+    def stats(self) -> Dict[str, JSON]:
+        with self._lock:
+            return {
+                "name": self._name,
+                "workers": self._workers,
+                "queue_limit": self._queue,
+                "running": min(self._pending, self._workers),
+                "queued": max(self._pending - self._workers, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "saturation": self._pending / (self._workers + self._queue),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _new_executor(self) -> Executor:
+        return ThreadPoolExecutor(self._workers, thread_name_prefix=self._name)
+
+    def _task(self, fn: Callable[..., _T], *args: Any) -> Callable[[], _T]:
+        return functools.partial(contextvars.copy_context().run, fn, *args)
+
+    def _done(self, fut: "Future[Any]") -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+
+class BoundedProcessPool(BoundedPool):
+    """
+    Process pool with a bounded submission queue.
+
+    Functions and their arguments must be picklable.
+    Context variables are not propagated to the worker processes.
+
+    :param workers: number of processes
+    :param queue: maximum number of calls waiting for a free process
+    :param name: name to be reported in stats
+    :param initializer: callable to warm up every worker process with
+    :param initargs: arguments of the initializer
+    :param max_tasks_per_child: number of calls after which a worker process
+        is replaced with a fresh one. Requires Python 3.11+.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue: int = 64,
+        name: str = "nomaj",
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Tuple[Any, ...] = (),
+        max_tasks_per_child: Optional[int] = None,
+    ):
+        self._initializer: Optional[Callable[..., None]] = initializer
+        self._initargs: Tuple[Any, ...] = initargs
+        self._max_tasks_per_child: Optional[int] = max_tasks_per_child
+        super(BoundedProcessPool, self).__init__(workers, queue, name)
+
+    def _new_executor(self) -> Executor:
+        kwargs: Dict[str, Any] = {}
+        if self._max_tasks_per_child is not None:
+            kwargs["max_tasks_per_child"] = self._max_tasks_per_child
+        return ProcessPoolExecutor(
+            self._workers,
+            initializer=self._initializer,
+            initargs=self._initargs,
+            **kwargs,
+        )
+
+    def _task(self, fn: Callable[..., _T], *args: Any) -> Callable[[], _T]:
+        return functools.partial(fn, *args)
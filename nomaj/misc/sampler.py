@@ -0,0 +1,90 @@
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Optional, Collection, List, Dict
+
+
+class Sampler:
+    """
+    Statistical profiler sampling the stacks of the threads.
+
+    A background thread takes the stacks of the given threads
+    (``sys._current_frames()``) every ``interval`` seconds and counts them.
+    Samples taken while a nomaj is responding are attributed to the route
+    of its request: the stack gets ``GET /path`` frame at its root.
+
+    :param threads: idents of the threads to sample. All threads if empty.
+    :param interval: sampling interval in seconds
+    """
+
+    def __init__(self, threads: Collection[int] = (), interval: float = 0.005):
+        if not interval > 0:
+            raise ValueError(f"Sampling interval must be positive, got {interval}")
+        self._threads: Collection[int] = threads
+        self._interval: float = interval
+        self._stacks: "Counter[str]" = Counter()
+        self._stopped: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._sample,
+            name=self.__class__.__name__,
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def samples(self) -> int:
+        return sum(self._stacks.values())
+
+    def collapsed(self) -> str:
+        """
+        Counted stacks in the collapsed format (``root;...;leaf count``)
+        of flamegraph.pl and speedscope.
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self._stacks.most_common()
+        )
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names: Dict[int, str] = {}
+        while not self._stopped.wait(self._interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (self._threads and ident not in self._threads):
+                    continue
+                if ident not in names:
+                    names = {
+                        t.ident: t.name
+                        for t in threading.enumerate()
+                        if t.ident is not None
+                    }
+                thread = names.get(ident, str(ident))
+                self._stacks[_collapsed(frame, thread, len(self._threads) != 1)] += 1
+
+
+def _collapsed(frame: Optional[FrameType], thread: str, with_thread: bool) -> str:
+    frames: List[str] = []
+    route: Optional[str] = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "respond_to" and code.co_argcount > 1:
+            request = frame.f_locals.get(code.co_varnames[1])
+            uri = getattr(request, "uri", None)
+            if uri is not None:
+                route = f"{getattr(request, 'method', '')} {uri.path}"
+        frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    if route is not None:
+        frames.append(route)
+    if with_thread:
+        frames.append(thread)
+    return ";".join(reversed(frames))
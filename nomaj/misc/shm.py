@@ -0,0 +1,210 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from logging import Logger
+from typing import Optional, Iterator, List, Tuple, Dict
+
+from nomaj.misc.store import Store
+
+_MAGIC = b"NMJSHM01"
+_HEADER = struct.Struct("<8sIII")
+_HEADER_SIZE = 64
+_BUCKET_HEADER_SIZE = 8
+# used, referenced, key length, value length, key hash, expiration timestamp
+_SLOT = struct.Struct("<BB2xIIQd4x")
+
+
+class StoreShm(Store):
+    """
+    Key/value store shared by the processes of a single host.
+
+    A fixed-size hash table in a memory-mapped file (``/dev/shm`` by default).
+    The table is split into buckets of ``ways`` slots each, a key may only
+    live in the bucket its hash points to. When the bucket is full an entry
+    is evicted following the clock (second chance) policy.
+    Buckets are guarded by ``fcntl`` record locks, so any process opening
+    the same file, not only forked children, may use the store safely.
+
+    Geometry parameters only take effect when the file is created,
+    processes attaching to an existing table use its geometry.
+    Values not fitting a slot are rejected (``put`` returns ``False``),
+    rejections are counted in ``stats()`` and the first one is logged.
+
+    :param name: name of the table
+    :param buckets: number of buckets
+    :param ways: number of slots per bucket
+    :param slot_size: maximum total length of a key and a value in bytes
+    :param directory: directory to keep the table in
+    :param logger: logger to report rejected values to
+    """
+
+    def __init__(
+        self,
+        name: str,
+        buckets: int = 1024,
+        ways: int = 8,
+        slot_size: int = 16 * 1024,
+        directory: str = "/dev/shm",
+        logger: Logger = logging.getLogger(__name__),
+    ):
+        self._path: str = os.path.join(directory, f"nomaj-{name}")
+        self._fd: int = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER_SIZE, 0)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(
+                    self._fd,
+                    _HEADER_SIZE
+                    + buckets * (_BUCKET_HEADER_SIZE + ways * (_SLOT.size + slot_size)),
+                )
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, buckets, ways, slot_size), 0)
+            magic, buckets, ways, slot_size = _HEADER.unpack(
+                os.pread(self._fd, _HEADER.size, 0)
+            )
+            if magic != _MAGIC:
+                raise ValueError(f"{self._path!r} is not a nomaj shared table")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+        self._buckets: int = buckets
+        self._ways: int = ways
+        self._capacity: int = slot_size
+        self._slot_size: int = _SLOT.size + slot_size
+        self._bucket_size: int = _BUCKET_HEADER_SIZE + ways * self._slot_size
+        self._mm: mmap.mmap = mmap.mmap(self._fd, 0)
+        self._tlocks: List[threading.Lock] = [threading.Lock() for _ in range(64)]
+        self._logger: Logger = logger
+        self._rejected: int = 0
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        h = _hash(key)
+        bucket = h % self._buckets
+        with self._locked(bucket):
+            found = self._find(bucket, h, key)
+            if found is None:
+                return None
+            offset, vlen = found
+            self._mm[offset + 1] = 1
+            start = offset + _SLOT.size + len(key)
+            return self._mm[start : start + vlen]
+
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        if len(key) + len(value) > self._capacity:
+            if self._rejected == 0:
+                self._logger.warning(
+                    "Value of %d bytes doesn't fit %d-byte slots of %r",
+                    len(key) + len(value),
+                    self._capacity,
+                    self._path,
+                )
+            self._rejected += 1
+            return False
+        h = _hash(key)
+        bucket = h % self._buckets
+        with self._locked(bucket):
+            found = self._find(bucket, h, key)
+            offset = found[0] if found is not None else self._victim(bucket)
+            start = offset + _SLOT.size
+            self._mm[start : start + len(key) + len(value)] = key + value
+            _SLOT.pack_into(
+                self._mm,
+                offset,
+                1,
+                1,
+                len(key),
+                len(value),
+                h,
+                time.time() + ttl if ttl is not None else 0.0,
+            )
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        h = _hash(key)
+        bucket = h % self._buckets
+        with self._locked(bucket):
+            found = self._find(bucket, h, key)
+            if found is None:
+                return False
+            self._mm[found[0]] = 0
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buckets": self._buckets,
+            "ways": self._ways,
+            "slot_size": self._capacity,
+            "rejected": self._rejected,
+        }
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    def unlink(self) -> None:
+        """
+        Remove the table file. Processes which have it open keep using it.
+        """
+        os.unlink(self._path)
+
+    def _find(self, bucket: int, h: int, key: bytes) -> Optional[Tuple[int, int]]:
+        """
+        :returns: offset of the live slot holding the key and its value length
+        """
+        base = self._bucket_offset(bucket) + _BUCKET_HEADER_SIZE
+        for way in range(self._ways):
+            offset = base + way * self._slot_size
+            used, _, klen, vlen, sh, expires = _SLOT.unpack_from(self._mm, offset)
+            if not used or sh != h or klen != len(key):
+                continue
+            start = offset + _SLOT.size
+            if self._mm[start : start + klen] != key:
+                continue
+            if expires and expires <= time.time():
+                self._mm[offset] = 0
+                return None
+            return offset, vlen
+        return None
+
+    def _victim(self, bucket: int) -> int:
+        """
+        :returns: offset of a free, expired or evicted slot
+        """
+        bucket_offset = self._bucket_offset(bucket)
+        base = bucket_offset + _BUCKET_HEADER_SIZE
+        now = time.time()
+        for way in range(self._ways):
+            offset = base + way * self._slot_size
+            used, _, _, _, _, expires = _SLOT.unpack_from(self._mm, offset)
+            if not used or (expires and expires <= now):
+                return offset
+        hand = self._mm[bucket_offset] % self._ways
+        while True:
+            offset = base + hand * self._slot_size
+            hand = (hand + 1) % self._ways
+            if self._mm[offset + 1]:
+                self._mm[offset + 1] = 0
+            else:
+                self._mm[bucket_offset] = hand
+                return offset
+
+    def _bucket_offset(self, bucket: int) -> int:
+        return _HEADER_SIZE + bucket * self._bucket_size
+
+    @contextmanager
+    def _locked(self, bucket: int) -> Iterator[None]:
+        with self._tlocks[bucket % len(self._tlocks)]:
+            start = self._bucket_offset(bucket)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, start)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, start)
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
@@ -0,0 +1,31 @@
+import asyncio
+import sqlite3
+from typing import AsyncIterator, Any, Optional
+
+from nomaj.misc.pool import BoundedPool
+
+
+async def rows_of(
+    cursor: sqlite3.Cursor, size: int = 256, pool: Optional[BoundedPool] = None
+) -> AsyncIterator[Any]:
+    """
+    Rows of the executed query fetched by batches in a worker thread.
+
+    The connection must be created with ``check_same_thread=False``
+    and must not be used by other threads while the rows are fetched.
+
+    :param cursor: cursor of the executed query
+    :param size: number of rows fetched at once
+    :param pool: pool to fetch in. The default executor of the loop if ``None``.
+    """
+    while True:
+        if pool is not None:
+            rows = await pool.run(cursor.fetchmany, size)
+        else:
+            rows = await asyncio.get_running_loop().run_in_executor(
+                None, cursor.fetchmany, size
+            )
+        if not rows:
+            return
+        for row in rows:
+            yield row
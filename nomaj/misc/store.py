@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from logging import Logger
+from typing import Optional, Tuple, Iterable, Dict
+
+from nomaj.misc.pool import BoundedPool, PoolSaturated
+
+# key: value and expiration time, or None if deleted
+_Batch = Dict[bytes, Optional[Tuple[bytes, Optional[float]]]]
+
+
+class Store(ABC):
+    """
+    Key/value storage of byte strings.
+
+    Backing store for caches, rate limiters and the like.
+    """
+
+    @abstractmethod
+    def get(self, key: bytes) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        """
+        Store the value.
+
+        :param ttl: time to live in seconds. Lives until evicted if ``None``.
+        :returns: whether the value was stored
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: bytes) -> bool:
+        """
+        :returns: whether the key was present
+        """
+        pass
+
+    def put_many(self, items: Iterable[Tuple[bytes, bytes, Optional[float]]]) -> None:
+        """
+        Store a batch of ``(key, value, ttl)`` items.
+        """
+        for key, value, ttl in items:
+            self.put(key, value, ttl)
+
+    def delete_many(self, keys: Iterable[bytes]) -> None:
+        for key in keys:
+            self.delete(key)
+
+
+class StoreLru(Store):
+    """
+    Per-process least recently used store.
+
+    :param capacity: maximum number of stored values
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._capacity: int = capacity
+        self._items: "OrderedDict[bytes, Tuple[bytes, float]]" = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires and expires <= time.time():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        self._items[key] = (value, time.time() + ttl if ttl is not None else 0.0)
+        self._items.move_to_end(key)
+        while len(self._items) > self._capacity:
+            self._items.popitem(last=False)
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        return self._items.pop(key, None) is not None
+
+
+class StoreWriteBehind(Store):
+    """
+    Store buffering writes and flushing them to the origin in batches.
+
+    Buffered writes are visible to reads right away. A batch is flushed
+    when it reaches ``batch`` items or ``delay`` seconds after the first
+    buffered write (outside of an event loop writes are flushed at once).
+    On an event loop batches are written in the pool, one at a time,
+    so the loop doesn't wait for the origin. A batch which failed
+    to be written is buffered again.
+
+    :param store: origin store
+    :param delay: maximum time in seconds a write stays buffered
+    :param batch: maximum number of buffered writes
+    :param pool: pool to write the batches in. A single thread of its own by default.
+    :param logger: logger to report failed writes to
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        delay: float = 1.0,
+        batch: int = 256,
+        pool: Optional[BoundedPool] = None,
+        logger: Logger = logging.getLogger(__name__),
+    ):
+        self._origin: Store = store
+        self._delay: float = delay
+        self._batch: int = batch
+        self._pool: BoundedPool = (
+            pool if pool is not None else BoundedPool(1, 0, self.__class__.__name__)
+        )
+        self._logger: Logger = logger
+        self._pending: _Batch = {}
+        self._writing: _Batch = {}
+        self._written: Optional["Future[None]"] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        for buffered in (self._pending, self._writing):
+            if key in buffered:
+                item = buffered[key]
+                if item is None:
+                    return None
+                value, expires = item
+                if expires is not None and expires <= time.time():
+                    return None
+                return value
+        return self._origin.get(key)
+
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        self._pending[key] = (value, time.time() + ttl if ttl is not None else None)
+        self._scheduled()
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        present = self.get(key) is not None
+        self._pending[key] = None
+        self._scheduled()
+        return present
+
+    def flush(self) -> None:
+        """
+        Writes the buffered items to the origin in the calling thread,
+        after the batch being written in the pool, if any.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._written is not None:
+            written, self._written = self._written, None
+            if written.exception() is not None:
+                self._pending = {**self._writing, **self._pending}
+            self._writing = {}
+        pending, self._pending = self._pending, {}
+        _written_to(self._origin, pending)
+
+    def _scheduled(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._written is not None:
+            # the next batch is flushed once the current one is written
+            return
+        if len(self._pending) >= self._batch:
+            self._flushed_behind()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._delay, self._flushed_behind)
+
+    def _flushed_behind(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._written is not None or not self._pending:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            written = self._pool.submit(_written_to, self._origin, self._pending)
+        except PoolSaturated:
+            self._timer = loop.call_later(self._delay, self._flushed_behind)
+            return
+        self._writing, self._pending = self._pending, {}
+        self._written = written
+        written.add_done_callback(
+            lambda fut: loop.call_soon_threadsafe(self._done, fut)
+        )
+
+    def _done(self, fut: "Future[None]") -> None:
+        if fut is not self._written:
+            return
+        batch, self._writing, self._written = self._writing, {}, None
+        error = fut.exception()
+        if error is not None:
+            self._logger.error(
+                "Failed to write %d items behind", len(batch), exc_info=error
+            )
+            self._pending = {**batch, **self._pending}
+        if self._pending:
+            self._scheduled()
+
+
+def _written_to(store: Store, batch: _Batch) -> None:
+    now = time.time()
+    store.put_many(
+        (key, item[0], None if item[1] is None else max(item[1] - now, 0.0))
+        for key, item in batch.items()
+        if item is not None
+    )
+    store.delete_many(key for key, item in batch.items() if item is None)
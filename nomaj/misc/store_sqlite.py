@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+from typing import Optional, Iterable, Tuple
+
+from nomaj.misc.store import Store
+
+
+class StoreSqlite(Store):
+    """
+    Store kept in a sqlite database file.
+
+    Survives restarts and may be shared by the processes of a host.
+    Expired items are removed on batch writes.
+
+    :param path: database file
+    :param table: table name
+    """
+
+    def __init__(self, path: str, table: str = "nomaj_store"):
+        self._conn: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._table: str = table
+        self._lock: threading.Lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key BLOB PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value FROM {self._table} "
+                "WHERE key = ? AND (expires = 0 OR expires > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        self.put_many(((key, value, ttl),))
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    f"DELETE FROM {self._table} WHERE key = ?", (key,)
+                ).rowcount
+                > 0
+            )
+
+    def put_many(self, items: Iterable[Tuple[bytes, bytes, Optional[float]]]) -> None:
+        now = time.time()
+        rows = [
+            (key, value, now + ttl if ttl is not None else 0.0)
+            for key, value, ttl in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?)", rows
+                )
+                self._conn.execute(
+                    f"DELETE FROM {self._table} WHERE expires != 0 AND expires <= ?",
+                    (now,),
+                )
+
+    def delete_many(self, keys: Iterable[bytes]) -> None:
+        rows = [(key,) for key in keys]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(f"DELETE FROM {self._table} WHERE key = ?", rows)
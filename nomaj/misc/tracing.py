@@ -0,0 +1,282 @@
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Optional, Dict, List, Any, Deque, Tuple
+
+from koda import Result, Err
+
+from nomaj.nomaj import Nomaj, Req, Resp
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE = "0" * 32
+_INVALID_SPAN = "0" * 16
+
+_SPAN: ContextVar[Optional["Span"]] = ContextVar("nomaj_span", default=None)
+
+
+class Span:
+    """
+    Timed operation of a trace.
+
+    Spans are created by ``Tracer.root`` for a request and by ``span``
+    for the operations within it. A span is current (the parent of the new
+    spans) from its creation until ``end``.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "finish",
+        "attributes",
+        "error",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name: str = name
+        self.trace_id: str = trace_id
+        self.span_id: str = "%016x" % random.getrandbits(64)
+        self.parent_id: Optional[str] = parent_id
+        self.start: int = time.time_ns()
+        self.finish: Optional[int] = None
+        self.attributes: Dict[str, Any] = attributes
+        self.error: Optional[str] = None
+        self._tracer: Tracer = tracer
+        self._token: Token = _SPAN.set(self)
+
+    def set(self, name: str, value: Any) -> None:
+        self.attributes[name] = value
+
+    def end(self, error: Optional[Exception] = None) -> None:
+        """
+        Finishes the span and makes its parent current again.
+
+        :param error: error the operation resulted in, if any
+        """
+        self.finish = time.time_ns()
+        if error is not None:
+            self.error = repr(error)
+        try:
+            _SPAN.reset(self._token)
+        except ValueError:
+            # ended in another context than started, e.g. in a callback
+            pass
+        self._tracer.exporter.export(self)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def duration(self) -> Optional[float]:
+        """
+        Duration in seconds if finished.
+        """
+        return (self.finish - self.start) / 1e9 if self.finish is not None else None
+
+    def __repr__(self):
+        return (
+            f"Span({self.name!r}, trace_id={self.trace_id}, span_id={self.span_id}, "
+            f"parent_id={self.parent_id}, duration={self.duration()!r})"
+        )
+
+
+class Exporter(ABC):
+    """
+    Receiver of the finished spans.
+    Called on the event loop, so it must not block.
+    """
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        pass
+
+
+class ExRing(Exporter):
+    """
+    Keeps the last finished spans in memory.
+
+    :param capacity: maximum number of spans kept
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._spans: Deque[Span] = deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """
+        Kept spans, the oldest first.
+
+        :param trace_id: to get the spans of the given trace only
+        """
+        if trace_id is None:
+            return list(self._spans)
+        return [s for s in self._spans if s.trace_id == trace_id]
+
+
+class ExOtel(Exporter):
+    """
+    Hands the spans over to an OpenTelemetry SDK span processor
+    (``opentelemetry-sdk`` is an optional dependency), e.g.
+    ``BatchSpanProcessor(OTLPSpanExporter())`` which exports them
+    in background.
+
+    :param processor: ``opentelemetry.sdk.trace.SpanProcessor``
+    :param service: service name of the exported spans
+    """
+
+    def __init__(self, processor: Any, service: str = "nomaj"):
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import ReadableSpan
+
+        self._trace = trace
+        self._readable = ReadableSpan
+        self._processor: Any = processor
+        self._resource = Resource.create({"service.name": service})
+
+    def export(self, span: Span) -> None:
+        trace = self._trace
+        context = trace.SpanContext(
+            int(span.trace_id, 16),
+            int(span.span_id, 16),
+            is_remote=False,
+            trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+        )
+        parent = (
+            trace.SpanContext(
+                int(span.trace_id, 16),
+                int(span.parent_id, 16),
+                is_remote=False,
+                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+            )
+            if span.parent_id is not None
+            else None
+        )
+        status = (
+            trace.Status(trace.StatusCode.ERROR, span.error)
+            if span.error is not None
+            else trace.Status(trace.StatusCode.UNSET)
+        )
+        self._processor.on_end(
+            self._readable(
+                name=span.name,
+                context=context,
+                parent=parent,
+                resource=self._resource,
+                attributes=span.attributes,
+                status=status,
+                start_time=span.start,
+                end_time=span.finish,
+            )
+        )
+
+
+class Tracer:
+    """
+    Starts traces of the incoming requests.
+
+    A request carrying a valid W3C ``traceparent`` continues its trace
+    and follows its sampling decision. Other requests start new traces
+    which are sampled with the given probability.
+
+    :param exporter: receiver of the finished spans
+    :param rate: probability of a new trace to be sampled
+    """
+
+    def __init__(self, exporter: Exporter, rate: float = 1.0):
+        self.exporter: Exporter = exporter
+        self._rate: float = rate
+
+    def root(
+        self, name: str, traceparent: Optional[str] = None, **attributes: Any
+    ) -> Optional[Span]:
+        """
+        Starts the span of a request and makes it current.
+
+        :param name: span name
+        :param traceparent: ``traceparent`` header of the request if any
+        :returns: the span or ``None`` if the request is not sampled
+        """
+        parent = parsed_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            if not sampled:
+                return None
+            return Span(self, name, trace_id, parent_id, attributes)
+        if self._rate < 1.0 and random.random() >= self._rate:
+            return None
+        return Span(self, name, "%032x" % random.getrandbits(128), None, attributes)
+
+
+def span(name: str, **attributes: Any) -> Optional[Span]:
+    """
+    Starts a child of the current span and makes it current.
+    Costs a context variable lookup when the request is not traced.
+
+    :returns: the span or ``None`` if there's no current span
+    """
+    parent = _SPAN.get()
+    if parent is None:
+        return None
+    return Span(parent._tracer, name, parent.trace_id, parent.span_id, attributes)
+
+
+async def responded_traced(nj: Nomaj, request: Req) -> Result[Resp, Exception]:
+    """
+    Response of the nomaj within a span named after its type.
+    """
+    sp = span(nj.__class__.__name__)
+    resp: Optional[Result[Resp, Exception]] = None
+    try:
+        resp = await nj.respond_to(request)
+        return resp
+    finally:
+        if sp is not None:
+            if isinstance(resp, Err):
+                sp.end(resp.val)
+            else:
+                sp.end()
+
+
+def current() -> Optional[Span]:
+    return _SPAN.get()
+
+
+def traceparent() -> Optional[str]:
+    """
+    ``traceparent`` header value to propagate the current trace
+    to outgoing requests.
+    """
+    sp = _SPAN.get()
+    return sp.traceparent() if sp is not None else None
+
+
+def parsed_traceparent(header: str) -> Optional[Tuple[str, str, bool]]:
+    """
+    Trace id, parent span id and sampled flag of a W3C ``traceparent``
+    header value (version 00).
+
+    :returns: ``None`` if the value is malformed or the ids are invalid
+    """
+    match = _TRACEPARENT.match(header.strip().lower())
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == _INVALID_TRACE or parent_id == _INVALID_SPAN:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Callable, Optional, Dict
+
+from koda import Result, Err
+from nvelope import JSON
+
+from nomaj.http_exception import HttpException
+from nomaj.misc.deadline import remaining
+from nomaj.misc.pool import BoundedPool, PoolSaturated
+from nomaj.nomaj import Nomaj, Req, Resp
+
+
+class NjBlocking(Nomaj):
+    """
+    Nomaj running a synchronous handler in a thread pool.
+
+    The request body is read beforehand and passed to the handler as bytes.
+    Responds with 503 if the pool is saturated and with 504 if the handler
+    doesn't finish within the timeout or the request deadline.
+
+    :param cb: blocking handler
+    :param pool: pool to run the handler in. May be shared among handlers.
+    :param timeout: maximum handler duration in seconds
+    """
+
+    def __init__(
+        self,
+        cb: Callable[[Req, bytes], Result[Resp, Exception]],
+        pool: BoundedPool,
+        timeout: Optional[float] = None,
+    ):
+        self._cb: Callable[[Req, bytes], Result[Resp, Exception]] = cb
+        self._pool: BoundedPool = pool
+        self._timeout: Optional[float] = timeout
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        body: bytes = await request.body.read()
+        timeout = self._timeout
+        left = remaining()
+        if left is not None and (timeout is None or left < timeout):
+            timeout = left
+        try:
+            return await asyncio.wait_for(
+                self._pool.run(self._cb, request, body), timeout
+            )
+        except PoolSaturated as e:
+            return Err(HttpException.from_status(503, str(e)))
+        except asyncio.TimeoutError:
+            return Err(HttpException.from_status(504, "blocking handler timed out"))
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "timeout": self._timeout,
+            },
+            "errors": [
+                {
+                    "type": HttpException.__name__,
+                    "status": 503,
+                    "description": "thread pool saturated",
+                },
+                {
+                    "type": HttpException.__name__,
+                    "status": 504,
+                    "description": "blocking handler timed out",
+                },
+            ],
+        }
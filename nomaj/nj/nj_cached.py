@@ -0,0 +1,209 @@
+import asyncio
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Optional,
+    Hashable,
+    Dict,
+    Tuple,
+    Collection,
+    FrozenSet,
+    Set,
+)
+
+from koda import Result, Ok, Err
+from nvelope import JSON
+
+from nomaj.misc.cache import Cache, CacheLru, CachedResp, cache_control, seconds, now
+from nomaj.nomaj import Nomaj, Req, Resp
+from nomaj.rq.rq_key import RqKey
+
+_CACHEABLE = frozenset((200, 203, 204, 300, 301, 404, 405, 410, 414, 501))
+
+
+class NjCached(Nomaj):
+    """
+    Caching nomaj.
+
+    Stores fully materialized responses of the origin honoring
+    ``Cache-Control`` (``no-store``, ``private``, ``max-age``, ``s-maxage``,
+    ``stale-while-revalidate``) and ``Vary`` of the response.
+    Stale entries are served while the origin is revalidated in the background.
+    Responses may be tagged via the ``Cache-Tag`` header (comma-separated)
+    to be purged with ``Cache.purge_tag``.
+    Responses setting cookies are never stored. Responses to requests
+    with credentials (``Authorization`` or ``Cookie``) are stored only if
+    marked ``public`` or ``s-maxage``, since the default key doesn't tell
+    the users apart.
+
+    :param nj: origin nomaj
+    :param cache: storage. May be shared among several routes.
+    :param key: primary key of the request. Requests with ``None`` key are not cached.
+        Entries may be purged by this key via ``Cache.purge``.
+    :param ttl: time to live in seconds for responses without explicit ``max-age``
+    :param swr: stale-while-revalidate window in seconds for responses without
+        explicit ``stale-while-revalidate``
+    :param name: route name to be reported in stats
+    :param vary_keys: maximum number of primary keys whose ``Vary`` headers
+        are remembered. Requests to the forgotten ones are misses.
+    """
+
+    def __init__(
+        self,
+        nj: Nomaj,
+        cache: Optional[Cache] = None,
+        key: Callable[[Req], Optional[Hashable]] = RqKey(headers=()),
+        ttl: float = 0.0,
+        swr: float = 0.0,
+        name: str = "",
+        vary_keys: int = 10000,
+    ):
+        self._nj: Nomaj = nj
+        self._cache: Cache = cache if cache is not None else CacheLru()
+        self._key: Callable[[Req], Optional[Hashable]] = key
+        self._ttl: float = ttl
+        self._swr: float = swr
+        self._name: str = name
+        self._vary: "OrderedDict[Hashable, Tuple[str, ...]]" = OrderedDict()
+        self._vary_keys: int = vary_keys
+        self._revalidating: Set[Hashable] = set()
+        self._tasks: Set["asyncio.Future[Result[Resp, Exception]]"] = set()
+        self._counts: _Counts = _Counts()
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        primary = self._key(request)
+        if primary is None:
+            return await self._nj.respond_to(request)
+        directives = cache_control(request.headers)
+        if "no-store" in directives:
+            return await self._nj.respond_to(request)
+        variant = self._variant(primary, request)
+        if "no-cache" not in directives:
+            entry = self._cache.get(primary, variant)
+            moment = now()
+            if entry is not None and entry.is_fresh(moment):
+                self._counts.hits += 1
+                return Ok(entry.as_resp(moment))
+            if entry is not None and entry.is_usable(moment):
+                self._counts.stale += 1
+                self._revalidate(primary, variant, request)
+                return Ok(entry.as_resp(moment))
+        self._counts.misses += 1
+        return await self._fetched(primary, request)
+
+    def stats(self) -> Dict[str, JSON]:
+        counts = self._counts
+        total = counts.hits + counts.stale + counts.misses
+        return {
+            "name": self._name,
+            "hits": counts.hits,
+            "stale": counts.stale,
+            "misses": counts.misses,
+            "hit_ratio": (counts.hits + counts.stale) / total if total else 0.0,
+        }
+
+    def _variant(self, primary: Hashable, request: Req) -> Tuple[str, ...]:
+        vary = self._vary.get(primary)
+        if vary is None:
+            return ()
+        self._vary.move_to_end(primary)
+        return tuple(",".join(request.headers.getall(h, [])) for h in vary)
+
+    def _revalidate(self, primary: Hashable, variant: Hashable, request: Req) -> None:
+        if (primary, variant) in self._revalidating:
+            return
+        self._revalidating.add((primary, variant))
+        task = asyncio.ensure_future(self._fetched(primary, request))
+        self._tasks.add(task)
+
+        def done(t: "asyncio.Future[Result[Resp, Exception]]") -> None:
+            self._tasks.discard(t)
+            self._revalidating.discard((primary, variant))
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(done)
+
+    async def _fetched(
+        self, primary: Hashable, request: Req
+    ) -> Result[Resp, Exception]:
+        resp = await self._nj.respond_to(request)
+        if isinstance(resp, Err) or resp.val.status not in _CACHEABLE:
+            return resp
+        directives = cache_control(resp.val.headers)
+        if (
+            "no-store" in directives
+            or "private" in directives
+            or "set-cookie" in resp.val.headers
+            or (
+                ("authorization" in request.headers or "cookie" in request.headers)
+                and "public" not in directives
+                and "s-maxage" not in directives
+            )
+        ):
+            return resp
+        vary: Tuple[str, ...] = tuple(
+            sorted(
+                {
+                    h.strip().lower()
+                    for header in resp.val.headers.getall("Vary", [])
+                    for h in header.split(",")
+                    if h.strip()
+                }
+            )
+        )
+        if "*" in vary:
+            return resp
+        ttl = seconds(directives.get("s-maxage", directives.get("max-age")), self._ttl)
+        if "no-cache" in directives:
+            ttl = 0.0
+        swr = seconds(directives.get("stale-while-revalidate"), self._swr)
+        if ttl <= 0 and swr <= 0:
+            return resp
+        body: bytes = await resp.val.body.read()
+        moment = now()
+        entry = CachedResp(
+            status=resp.val.status,
+            headers=tuple(resp.val.headers.items()),
+            body=body,
+            stored=moment,
+            fresh_until=moment + ttl,
+            stale_until=moment + ttl + swr,
+            tags=_tags(resp.val.headers.getall("Cache-Tag", [])),
+        )
+        self._vary[primary] = vary
+        self._vary.move_to_end(primary)
+        while len(self._vary) > self._vary_keys:
+            self._vary.popitem(last=False)
+        self._cache.put(primary, self._variant(primary, request), entry)
+        return Ok(entry.as_resp(moment))
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "name": self._name,
+                "ttl": self._ttl,
+                "swr": self._swr,
+            },
+            "children": [
+                self._nj.meta(),
+            ],
+        }
+
+
+class _Counts:
+    """
+    Counters of a cached nomaj, shared with its copies (see ``NjInstrumented``).
+    """
+
+    __slots__ = ("hits", "stale", "misses")
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.stale: int = 0
+        self.misses: int = 0
+
+
+def _tags(headers: Collection[str]) -> FrozenSet[str]:
+    return frozenset(t.strip() for h in headers for t in h.split(",") if t.strip())
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Dict
+
+from koda import Result, Err
+from nvelope import JSON
+
+from nomaj.http_exception import HttpException
+from nomaj.misc.deadline import deadline_in, remaining
+from nomaj.nomaj import Nomaj, Req, Resp
+
+
+class NjDeadline(Nomaj):
+    """
+    Nomaj bounded in time.
+
+    Tightens the request deadline to ``timeout`` seconds and responds
+    with 504 once it is exceeded.
+    If less than ``cost`` seconds are left the request fails immediately.
+
+    :param nj: origin nomaj
+    :param timeout: time budget for the origin in seconds
+    :param cost: expected duration of the origin in seconds. Default to 0.
+    """
+
+    def __init__(self, nj: Nomaj, timeout: float, cost: float = 0.0):
+        self._nj: Nomaj = nj
+        self._timeout: float = timeout
+        self._cost: float = cost
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        with deadline_in(self._timeout):
+            left = remaining()
+            assert left is not None
+            if left <= self._cost:
+                return Err(HttpException.from_status(504, "deadline exceeded"))
+            try:
+                return await asyncio.wait_for(self._nj.respond_to(request), left)
+            except asyncio.TimeoutError:
+                return Err(HttpException.from_status(504, "deadline exceeded"))
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "timeout": self._timeout,
+                "cost": self._cost,
+            },
+            "children": [
+                self._nj.meta(),
+            ],
+            "errors": [
+                {
+                    "type": HttpException.__name__,
+                    "status": 504,
+                    "description": "deadline exceeded",
+                },
+            ],
+        }
@@ -0,0 +1,166 @@
+import asyncio
+import dataclasses
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Optional, Dict, Tuple
+from urllib.parse import ParseResult
+
+from koda import Result, Ok, Err
+from multidict import CIMultiDict, CIMultiDictProxy
+from nvelope import JSON
+
+from nomaj.body import BodyOf
+from nomaj.http_exception import HttpException
+from nomaj.misc.deadline import remaining
+from nomaj.misc.pool import BoundedProcessPool, PoolSaturated
+from nomaj.nomaj import Nomaj, Req, Resp
+
+
+@dataclasses.dataclass(frozen=True)
+class ReqPlain:
+    """
+    Picklable request with the body read.
+    """
+
+    method: str
+    uri: ParseResult
+    headers: Tuple[Tuple[str, str], ...]
+    body: bytes
+
+
+@dataclasses.dataclass(frozen=True)
+class RespPlain:
+    """
+    Picklable response with the body read.
+    """
+
+    status: int
+    headers: Tuple[Tuple[str, str], ...] = ()
+    body: bytes = b""
+
+
+class NjInProcess(Nomaj):
+    """
+    Nomaj running a CPU-bound handler in a process pool.
+
+    The handler must be picklable (e.g. a module level function).
+    It gets the request as ``ReqPlain`` and returns ``RespPlain``,
+    exceptions it raises are returned as errors.
+    Request bodies larger than ``shm_threshold`` bytes are passed
+    through shared memory instead of the pool's pipe. The segment is released
+    once the call is over, even if it outlives the timeout.
+    Responds with 503 if the pool is saturated and with 504 if the handler
+    doesn't finish within the timeout or the request deadline.
+
+    :param cb: picklable handler
+    :param pool: pool to run the handler in. May be shared among handlers.
+    :param timeout: maximum handler duration in seconds
+    :param shm_threshold: body size to pass the body via shared memory from
+    """
+
+    def __init__(
+        self,
+        cb: Callable[[ReqPlain], RespPlain],
+        pool: BoundedProcessPool,
+        timeout: Optional[float] = None,
+        shm_threshold: int = 1024 * 1024,
+    ):
+        self._cb: Callable[[ReqPlain], RespPlain] = cb
+        self._pool: BoundedProcessPool = pool
+        self._timeout: Optional[float] = timeout
+        self._shm_threshold: int = shm_threshold
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        body: bytes = await request.body.read()
+        timeout = self._timeout
+        left = remaining()
+        if left is not None and (timeout is None or left < timeout):
+            timeout = left
+        shm: Optional[SharedMemory] = None
+        if len(body) >= self._shm_threshold:
+            shm = SharedMemory(create=True, size=len(body))
+            buf = shm.buf
+            assert buf is not None
+            buf[: len(body)] = body
+        rq = ReqPlain(
+            request.method,
+            request.uri,
+            tuple(request.headers.items()),
+            b"" if shm is not None else body,
+        )
+        try:
+            fut: "Future[RespPlain]" = self._pool.submit(
+                _serve,
+                self._cb,
+                rq,
+                shm.name if shm is not None else None,
+                len(body),
+            )
+        except PoolSaturated as e:
+            if shm is not None:
+                _released(shm)
+            return Err(HttpException.from_status(503, str(e)))
+        if shm is not None:
+            segment: SharedMemory = shm
+            fut.add_done_callback(lambda _: _released(segment))
+        try:
+            rs: RespPlain = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(fut)), timeout
+            )
+        except asyncio.TimeoutError:
+            fut.cancel()
+            return Err(HttpException.from_status(504, "process handler timed out"))
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            return Err(e)
+        return Ok(
+            Resp(
+                rs.status,
+                CIMultiDictProxy(CIMultiDict(rs.headers)),
+                BodyOf(rs.body),
+            )
+        )
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "timeout": self._timeout,
+            },
+            "errors": [
+                {
+                    "type": HttpException.__name__,
+                    "status": 503,
+                    "description": "process pool saturated",
+                },
+                {
+                    "type": HttpException.__name__,
+                    "status": 504,
+                    "description": "process handler timed out",
+                },
+            ],
+        }
+
+
+def _released(shm: SharedMemory) -> None:
+    shm.close()
+    shm.unlink()
+
+
+def _serve(
+    cb: Callable[[ReqPlain], RespPlain],
+    rq: ReqPlain,
+    shm_name: Optional[str],
+    size: int,
+) -> RespPlain:
+    if shm_name is not None:
+        shm = SharedMemory(shm_name)
+        try:
+            buf = shm.buf
+            assert buf is not None
+            rq = dataclasses.replace(rq, body=bytes(buf[:size]))
+        finally:
+            shm.close()
+    return cb(rq)
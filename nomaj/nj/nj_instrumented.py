@@ -0,0 +1,222 @@
+import copy
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional, List, Tuple, Set, Any, Union
+
+from koda import Result, Ok, Err
+from nvelope import JSON
+
+from nomaj.fork import Fork
+from nomaj.misc.metrics import Metrics, RouteStats
+from nomaj.nomaj import Nomaj, Req, Resp
+from nomaj.rs.rs_with_headers import rs_with_headers
+
+_TIMINGS: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "nomaj_timings", default=None
+)
+
+
+class NjInstrumented(Nomaj):
+    """
+    Nomaj recording request counts, errors and latency of every node of its tree.
+
+    On creation every ``Nomaj`` and ``Fork`` reachable from the given nomaj
+    through its attributes is wrapped with a timing decorator. The nodes
+    are shallow copies, so the given tree is left as is, but the nodes
+    of the instrumented tree are not the given ones: state kept in
+    attributes that are reassigned rather than mutated (e.g. an ``int``
+    counter) is not seen through the given nodes. Nodes of the library
+    keep such state in shared objects, e.g. ``NjCached.stats()`` of the given
+    node counts the requests served by its copy.
+    Nodes are labelled by their path in the tree built from their ``meta()``
+    (type plus pattern, methods etc.), e.g. ``NjFork > FkRegex(^/users) > NjFixed``.
+    Identical labels of different nodes get a ``#2``, ``#3``... suffix in the
+    order of the tree, e.g. ``NjFork > FkMethods(GET) > NjFixed #2``.
+    A node of a nomaj is counted when it responds, a fork when it matches.
+    The nodes below a node shared by several branches are counted under
+    the labels of the branch it was reached through first.
+
+    :param nj: nomaj to instrument
+    :param metrics: registry to record to. May be served by ``NjMetrics``.
+    :param server_timing: whether to add ``Server-Timing`` header
+        with the time spent in every node to the responses
+    :param depth: maximum depth of the wrapped nodes, the root being 1.
+        Bounds the overhead (about a microsecond per node passed) for deep trees.
+        Unlimited by default.
+    """
+
+    def __init__(
+        self,
+        nj: Nomaj,
+        metrics: Optional[Metrics] = None,
+        server_timing: bool = False,
+        depth: Optional[int] = None,
+    ):
+        self._metrics: Metrics = metrics if metrics is not None else Metrics()
+        self._server_timing: bool = server_timing
+        self._nj: Nomaj = instrumented(nj, self._metrics, depth)
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        if not self._server_timing:
+            return await self._nj.respond_to(request)
+        timings: List[Tuple[str, float]] = []
+        token = _TIMINGS.set(timings)
+        try:
+            resp = await self._nj.respond_to(request)
+        finally:
+            _TIMINGS.reset(token)
+        if isinstance(resp, Ok) and timings:
+            return Ok(
+                rs_with_headers(resp.val, (("Server-Timing", server_timing(timings)),))
+            )
+        return resp
+
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "server_timing": self._server_timing,
+            },
+            "children": [self._nj.meta()],
+        }
+
+
+def instrumented(nj: Nomaj, metrics: Metrics, depth: Optional[int] = None) -> Nomaj:
+    """
+    Wraps the nomaj and the nomajes and forks of its tree (not deeper than
+    ``depth``) with timing decorators recording to the metrics.
+    """
+    node = _wrapped(nj, metrics, "", {}, set(), depth)
+    assert isinstance(node, Nomaj)
+    return node
+
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """
+    ``Server-Timing`` header value of (label, seconds) pairs.
+    """
+    return ", ".join(
+        'n%d;dur=%.3f;desc="%s"'
+        % (i, seconds * 1000, label.replace("\\", "\\\\").replace('"', '\\"'))
+        for i, (label, seconds) in enumerate(timings)
+    )
+
+
+class _NjTimed(Nomaj):
+    def __init__(self, nj: Nomaj, stats: RouteStats):
+        self._nj: Nomaj = nj
+        self._stats: RouteStats = stats
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        resp: Optional[Result[Resp, Exception]] = None
+        start = perf_counter()
+        try:
+            resp = await self._nj.respond_to(request)
+            return resp
+        finally:
+            elapsed = perf_counter() - start
+            stats = self._stats
+            stats.requests += 1
+            if not isinstance(resp, Ok):
+                stats.errors += 1
+            stats.latency.observe(elapsed)
+            timings = _TIMINGS.get()
+            if timings is not None:
+                timings.append((stats.route, elapsed))
+
+    def meta(self) -> Dict[str, JSON]:
+        return self._nj.meta()
+
+
+class _FkTimed(Fork):
+    def __init__(self, fork: Fork, stats: RouteStats):
+        self._fork: Fork = fork
+        self._stats: RouteStats = stats
+
+    def route(self, request: Req) -> Result[Optional[Nomaj], Exception]:
+        start = perf_counter()
+        nj = self._fork.route(request)
+        if isinstance(nj, Err) or nj.val is not None:
+            elapsed = perf_counter() - start
+            stats = self._stats
+            stats.requests += 1
+            if isinstance(nj, Err):
+                stats.errors += 1
+            stats.latency.observe(elapsed)
+        return nj
+
+    def meta(self) -> Dict[str, JSON]:
+        return self._fork.meta()
+
+
+def _wrapped(
+    node: Union[Nomaj, Fork],
+    metrics: Metrics,
+    parent: str,
+    copies: Dict[int, Union[Nomaj, Fork]],
+    labels: Set[str],
+    depth: Optional[int],
+) -> Union[Nomaj, Fork]:
+    if isinstance(node, (_NjTimed, _FkTimed)) or depth == 0:
+        return node
+    depth = depth - 1 if depth is not None else None
+    label = _unique(_label(node, parent), labels)
+    if id(node) in copies:
+        node = copies[id(node)]
+    elif hasattr(node, "__dict__"):
+        original, node = node, copy.copy(node)
+        # registered before the children, so that cycles lead to the copy
+        copies[id(original)] = node
+        for name, value in list(vars(node).items()):
+            replaced = _replaced(value, metrics, label, copies, labels, depth)
+            if replaced is not value:
+                setattr(node, name, replaced)
+    if isinstance(node, Nomaj):
+        return _NjTimed(node, metrics.route(label, "nomaj"))
+    return _FkTimed(node, metrics.route(label, "fork"))
+
+
+def _replaced(
+    value: Any,
+    metrics: Metrics,
+    parent: str,
+    copies: Dict[int, Union[Nomaj, Fork]],
+    labels: Set[str],
+    depth: Optional[int],
+) -> Any:
+    if isinstance(value, (Nomaj, Fork)):
+        return _wrapped(value, metrics, parent, copies, labels, depth)
+    if isinstance(value, (tuple, list)) and any(
+        isinstance(v, (Nomaj, Fork)) for v in value
+    ):
+        return type(value)(
+            _replaced(v, metrics, parent, copies, labels, depth) for v in value
+        )
+    return value
+
+
+def _unique(label: str, labels: Set[str]) -> str:
+    unique = label
+    n = 1
+    while unique in labels:
+        n += 1
+        unique = f"{label} #{n}"
+    labels.add(unique)
+    return unique
+
+
+def _label(node: Union[Nomaj, Fork], parent: str) -> str:
+    meta = node.meta()
+    info = meta.get("nomaj") or meta.get("fork") or {}
+    part = str(info.get("type", node.__class__.__name__))
+    details = [
+        ",".join(map(str, value)) if isinstance(value, list) else str(value)
+        for key, value in info.items()
+        if key in ("pattern", "methods", "host", "name", "path")
+    ]
+    if details:
+        part = f"{part}({' '.join(details)})"
+    return f"{parent} > {part}" if parent else part
@@ -0,0 +1,36 @@
+from typing import Dict
+
+from koda import Result, Ok
+from multidict import CIMultiDictProxy, CIMultiDict
+from nvelope import JSON
+
+from nomaj.body import BodyOf
+from nomaj.misc.metrics import Metrics
+from nomaj.nomaj import Nomaj, Req, Resp
+
+_HEADERS = CIMultiDictProxy(
+    CIMultiDict({"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+)
+
+
+class NjMetrics(Nomaj):
+    """
+    Nomaj serving the metrics in the Prometheus text format.
+
+    The metrics are those of the serving process only.
+
+    :param metrics: metrics to serve, e.g. ``NjInstrumented.metrics()``
+    """
+
+    def __init__(self, metrics: Metrics):
+        self._metrics: Metrics = metrics
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        return Ok(Resp(200, _HEADERS, BodyOf(self._metrics.prometheus())))
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+            },
+        }
@@ -0,0 +1,147 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl
+
+from koda import Result, Err, Ok
+from nvelope import JSON
+
+from nomaj.fk.auth.identity import is_anon
+from nomaj.fk.auth.ps import Pass
+from nomaj.http_exception import HttpException
+from nomaj.misc.sampler import Sampler
+from nomaj.nomaj import Nomaj, Req, Resp
+from nomaj.rs.rs_builder import rs
+
+_SORTS = frozenset(key.value for key in pstats.SortKey)
+
+
+class NjProfiler(Nomaj):
+    """
+    Admin endpoint profiling the worker it runs in.
+
+    Profiles the worker for ``seconds`` (query parameter) and responds
+    with the result. Query parameters:
+
+    - ``mode``: ``sample`` (default) takes the stacks of the event loop
+      thread (of all threads with ``threads=all``) every ``interval``
+      seconds and responds with collapsed stacks ready for flamegraph.pl
+      or speedscope. Samples are attributed to the request being handled.
+      ``cprofile`` runs the deterministic profiler on the event loop thread
+      and responds with ``pstats`` text (``format=binary`` gives
+      the ``marshal`` dump loadable by ``pstats.Stats``).
+    - ``pid``: the worker to profile. Another worker responds with 421
+      and ``X-Nomaj-Pid`` header, so the request is to be retried until
+      it reaches the right one.
+    - ``sort``, ``limit``: ordering (one of ``pstats.SortKey`` values)
+      and number of the ``pstats`` lines
+
+    Only a single profiling runs in a worker at a time, the others get 409.
+
+    :param pss: pass the admin is to be identified by. Anonymous users get 401.
+    :param max_seconds: maximum profiling duration
+    :param interval: default sampling interval in seconds
+    """
+
+    def __init__(self, pss: Pass, max_seconds: float = 60.0, interval: float = 0.005):
+        self._pass: Pass = pss
+        self._max_seconds: float = max_seconds
+        self._interval: float = interval
+        self._lock: threading.Lock = threading.Lock()
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        identity = await self._pass.enter(request)
+        if isinstance(identity, Err):
+            return identity
+        if is_anon(identity.val):
+            return Err(HttpException.from_status(401))
+        params: Dict[str, str] = dict(parse_qsl(request.uri.query))
+        pid = str(os.getpid())
+        headers = (("X-Nomaj-Pid", pid),)
+        if params.get("pid", pid) != pid:
+            return Ok(rs(421, f"this is worker {pid}\n", "text/plain", headers))
+        try:
+            seconds = min(float(params.get("seconds", "10")), self._max_seconds)
+            interval = float(params.get("interval", self._interval))
+            limit = int(params.get("limit", "100"))
+        except ValueError as e:
+            return Ok(rs(400, f"{e}\n", "text/plain", headers))
+        if not seconds > 0 or not interval > 0:
+            return Ok(
+                rs(
+                    400,
+                    "seconds and interval must be positive\n",
+                    "text/plain",
+                    headers,
+                )
+            )
+        mode = params.get("mode", "sample")
+        if mode not in ("sample", "cprofile"):
+            return Ok(rs(400, f"unknown mode {mode!r}\n", "text/plain", headers))
+        sort = params.get("sort", pstats.SortKey.CUMULATIVE.value)
+        if sort not in _SORTS:
+            return Ok(rs(400, f"unknown sort {sort!r}\n", "text/plain", headers))
+        if not self._lock.acquire(blocking=False):
+            return Ok(rs(409, "already profiling\n", "text/plain", headers))
+        try:
+            if mode == "sample":
+                collapsed = await self._sampled(
+                    seconds, interval, params.get("threads") == "all"
+                )
+                return Ok(rs(200, collapsed, "text/plain", headers))
+            profiled, content_type = await self._profiled(
+                seconds,
+                sort,
+                limit,
+                params.get("format") == "binary",
+            )
+            return Ok(rs(200, profiled, content_type, headers))
+        finally:
+            self._lock.release()
+
+    async def _sampled(self, seconds: float, interval: float, all_threads: bool) -> str:
+        sampler = Sampler(() if all_threads else (threading.get_ident(),), interval)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+        return sampler.collapsed()
+
+    async def _profiled(
+        self, seconds: float, sort: str, limit: int, binary: bool
+    ) -> Tuple[bytes, str]:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+        if binary:
+            profile.create_stats()
+            stats: bytes = marshal.dumps(profile.stats)  # type: ignore
+            return stats, "application/octet-stream"
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue().encode(), "text/plain"
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "pass": self._pass.meta(),
+                "max_seconds": self._max_seconds,
+            },
+            "errors": [
+                {
+                    "type": HttpException.__name__,
+                    "status": 401,
+                    "description": "not authenticated",
+                },
+            ],
+        }
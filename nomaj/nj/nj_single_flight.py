@@ -0,0 +1,102 @@
+import asyncio
+import dataclasses
+from typing import Callable, Optional, Hashable, Dict, Tuple
+
+from koda import Result, Ok, Err
+from nvelope import JSON
+
+from nomaj.body import BodyOf
+from nomaj.nomaj import Nomaj, Req, Resp
+from nomaj.rq.rq_key import RqKey
+
+_Flight = Result[Tuple[Resp, bytes], Exception]
+
+
+class NjSingleFlight(Nomaj):
+    """
+    Coalesces concurrent identical requests.
+
+    Only one request per key is passed to the origin at a time.
+    Its response body is read once and every concurrent duplicate
+    gets its own replayable copy of it.
+    The origin is called in a task of its own, so cancellation of the request
+    which started it (e.g. by a deadline) doesn't cancel it for the others.
+
+    :param nj: origin nomaj
+    :param key: request key. Requests with ``None`` key are never coalesced.
+    :param max_wait: maximum time in seconds a duplicate waits for the
+        running request before falling through to the origin. Waits forever if ``None``.
+    :param share_errors: whether duplicates get the error of the running request
+        or fall through to the origin.
+    """
+
+    def __init__(
+        self,
+        nj: Nomaj,
+        key: Callable[[Req], Optional[Hashable]] = RqKey(),
+        max_wait: Optional[float] = None,
+        share_errors: bool = True,
+    ):
+        self._nj: Nomaj = nj
+        self._key: Callable[[Req], Optional[Hashable]] = key
+        self._max_wait: Optional[float] = max_wait
+        self._share_errors: bool = share_errors
+        self._flights: Dict[Hashable, "asyncio.Future[_Flight]"] = {}
+
+    async def respond_to(self, request: Req) -> Result[Resp, Exception]:
+        key = self._key(request)
+        if key is None:
+            return await self._nj.respond_to(request)
+        flight = self._flights.get(key)
+        if flight is None:
+            return _replayed(await asyncio.shield(self._started(key, request)))
+        try:
+            shared = await asyncio.wait_for(asyncio.shield(flight), self._max_wait)
+        except asyncio.TimeoutError:
+            return await self._nj.respond_to(request)
+        except asyncio.CancelledError:
+            if not flight.cancelled():
+                raise
+            return await self._nj.respond_to(request)
+        if isinstance(shared, Err) and not self._share_errors:
+            return await self._nj.respond_to(request)
+        return _replayed(shared)
+
+    def _started(self, key: Hashable, request: Req) -> "asyncio.Future[_Flight]":
+        flight = asyncio.ensure_future(self._materialized(request))
+        self._flights[key] = flight
+
+        def landed(_: "asyncio.Future[_Flight]") -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+        flight.add_done_callback(landed)
+        return flight
+
+    async def _materialized(self, request: Req) -> _Flight:
+        try:
+            resp = await self._nj.respond_to(request)
+            if isinstance(resp, Err):
+                return resp
+            return Ok((resp.val, await resp.val.body.read()))
+        except Exception as e:
+            return Err(e)
+
+    def meta(self) -> Dict[str, JSON]:
+        return {
+            "nomaj": {
+                "type": self.__class__.__name__,
+                "max_wait": self._max_wait,
+                "share_errors": self._share_errors,
+            },
+            "children": [
+                self._nj.meta(),
+            ],
+        }
+
+
+def _replayed(shared: _Flight) -> Result[Resp, Exception]:
+    if isinstance(shared, Err):
+        return shared
+    resp, body = shared.val
+    return Ok(dataclasses.replace(resp, body=BodyOf(body)))
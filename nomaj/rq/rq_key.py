@@ -0,0 +1,38 @@
+from typing import Collection, Optional, Tuple
+
+from nomaj.nomaj import Req
+
+
+class RqKey:
+    """
+    Identity key of a request.
+
+    Requests with equal keys are expected to get equal responses.
+    Key consists of method, path, query and values of the selected headers.
+
+    :param headers: headers the response depends on
+    :param methods: methods which are safe to be keyed. Other requests get no key.
+    """
+
+    def __init__(
+        self,
+        headers: Collection[str] = (
+            "Accept",
+            "Accept-Encoding",
+            "Authorization",
+            "Cookie",
+        ),
+        methods: Collection[str] = ("GET", "HEAD"),
+    ):
+        self._headers: Tuple[str, ...] = tuple(headers)
+        self._methods: Collection[str] = frozenset(methods)
+
+    def __call__(self, request: Req) -> Optional[Tuple[str, ...]]:
+        if request.method not in self._methods:
+            return None
+        return (
+            request.method,
+            request.uri.path,
+            request.uri.query,
+            *(",".join(request.headers.getall(h, [])) for h in self._headers),
+        )
@@ -0,0 +1,79 @@
+from typing import Optional, Collection, Tuple, Union, AsyncIterable
+
+from multidict import CIMultiDictProxy, CIMultiDict
+
+from nomaj.body import Body, EmptyBody
+from nomaj.misc.headers import HeadersLayered, layered
+from nomaj.nomaj import Resp
+from nomaj.rs.rs_with_body import body_of
+from nomaj.rs.rs_with_cookie import set_cookie
+
+
+class RsBuilder:
+    """
+    Accumulates parts of a response and makes the ``Resp`` once.
+
+    Unlike chaining ``rs_with_*`` functions, it doesn't create
+    an intermediate ``Resp`` for every step.
+
+    :param resp: response to start from. Empty 200 response by default.
+    """
+
+    def __init__(self, resp: Optional[Resp] = None):
+        self._status: int = resp.status if resp is not None else 200
+        self._headers: HeadersLayered = (
+            layered(resp.headers)
+            if resp is not None
+            else HeadersLayered(CIMultiDictProxy(CIMultiDict()))
+        )
+        self._body: Body = resp.body if resp is not None else EmptyBody()
+
+    def status(self, status: int) -> "RsBuilder":
+        self._status = status
+        return self
+
+    def headers(self, headers: Collection[Tuple[str, str]]) -> "RsBuilder":
+        self._headers = self._headers.with_(headers)
+        return self
+
+    def header(self, name: str, value: str) -> "RsBuilder":
+        return self.headers(((name, value),))
+
+    def without(self, *names: str) -> "RsBuilder":
+        self._headers = self._headers.without(names)
+        return self
+
+    def type(self, content_type: str, charset: Optional[str] = None) -> "RsBuilder":
+        return self.without("Content-Type").header(
+            "Content-Type",
+            content_type if charset is None else f"{content_type}; charset={charset}",
+        )
+
+    def json(self) -> "RsBuilder":
+        return self.type("application/json")
+
+    def cookie(self, name: str, value: str, *attrs: str) -> "RsBuilder":
+        return self.header("Set-Cookie", set_cookie(name, value, *attrs))
+
+    def body(self, body: Union[Body, str, bytes, AsyncIterable[bytes]]) -> "RsBuilder":
+        self._body = body_of(body)
+        return self
+
+    def resp(self) -> Resp:
+        assert self._status in range(100, 1000)
+        return Resp(self._status, self._headers, self._body)
+
+
+def rs(
+    status: int = 200,
+    body: Union[Body, str, bytes, AsyncIterable[bytes]] = b"",
+    content_type: Optional[str] = None,
+    headers: Collection[Tuple[str, str]] = (),
+) -> Resp:
+    """
+    Make a response in one go.
+    """
+    builder = RsBuilder().status(status).body(body)
+    if content_type is not None:
+        builder.type(content_type)
+    return builder.headers(headers).resp()
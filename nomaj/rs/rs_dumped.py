@@ -1,17 +1,25 @@
-import json
+import asyncio
+import functools
 from dataclasses import replace
-from typing import Union
+from typing import Union, Callable, Optional, List
 
 from koda import Result, Err, Ok
 from nvelope import JSON, Compound, NvelopeError
 
+from nomaj.http_exception import HttpException
+from nomaj.misc.dumps import DumpsStd
+from nomaj.misc.pool import BoundedPool, PoolSaturated
 from nomaj.nomaj import Resp
 from nomaj.body import BodyOf
 from nomaj.rs.rs_with_type import rs_json
 
+_DUMPS: Callable[[JSON], Union[str, bytes]] = DumpsStd()
+
 
 def rs_dumped(
-    j: JSON, rs: Resp = Resp(status=200), dumps=json.dumps
+    j: JSON,
+    rs: Resp = Resp(status=200),
+    dumps: Callable[[JSON], Union[str, bytes]] = _DUMPS,
 ) -> Result[Resp, Exception]:
     try:
         return Ok(
@@ -22,15 +30,83 @@ def rs_dumped(
                 )
             )
         )
-    except TypeError as e:
+    except (TypeError, ValueError) as e:
         return Err(e)
 
 
 def rs_nvelope_dumped(
-    nvlp: Compound, rs: Resp = Resp(status=200), dumps=json.dumps
-) -> Result[Resp, Union[NvelopeError, TypeError]]:
+    nvlp: Compound,
+    rs: Resp = Resp(status=200),
+    dumps: Callable[[JSON], Union[str, bytes]] = _DUMPS,
+) -> Result[Resp, Union[NvelopeError, TypeError, ValueError]]:
     try:
         j = nvlp.as_json()
     except NvelopeError as e:
         return Err(e)
     return rs_dumped(j, rs, dumps)
+
+
+async def rs_dumped_async(
+    j: JSON,
+    rs: Resp = Resp(status=200),
+    dumps: Callable[[JSON], Union[str, bytes]] = _DUMPS,
+    threshold: int = 1000,
+    pool: Optional[BoundedPool] = None,
+    offload: Optional[bool] = None,
+) -> Result[Resp, Exception]:
+    """
+    Same as ``rs_dumped`` but large payloads are encoded in a worker thread
+    not to stall the event loop.
+
+    :param threshold: size of the payload from which it's encoded in a thread.
+        Items of the lists and dicts at any depth count one each,
+        strings one per 64 characters.
+        The payload is walked until the threshold is reached, not further.
+    :param pool: pool to encode in. The default executor of the loop if ``None``.
+        A saturated pool results in 503.
+    :param offload: whether to encode in a thread regardless of the size,
+        e.g. if it's known in advance
+    """
+    if offload is None:
+        offload = _exceeds(j, threshold)
+    if not offload:
+        return rs_dumped(j, rs, dumps)
+    if pool is not None:
+        try:
+            return await pool.run(rs_dumped, j, rs, dumps)
+        except PoolSaturated as e:
+            return Err(HttpException.from_status(503, str(e)))
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(rs_dumped, j, rs, dumps)
+    )
+
+
+async def rs_nvelope_dumped_async(
+    nvlp: Compound,
+    rs: Resp = Resp(status=200),
+    dumps: Callable[[JSON], Union[str, bytes]] = _DUMPS,
+    threshold: int = 1000,
+    pool: Optional[BoundedPool] = None,
+    offload: Optional[bool] = None,
+) -> Result[Resp, Exception]:
+    try:
+        j = nvlp.as_json()
+    except NvelopeError as e:
+        return Err(e)
+    return await rs_dumped_async(j, rs, dumps, threshold, pool, offload)
+
+
+def _exceeds(j: JSON, threshold: int) -> bool:
+    size = 0
+    stack: List[JSON] = [j]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += len(item) // 64
+        elif isinstance(item, (dict, list)):
+            size += len(item)
+            if size < threshold:
+                stack.extend(item.values() if isinstance(item, dict) else item)
+        if size >= threshold:
+            return True
+    return False
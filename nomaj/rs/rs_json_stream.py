@@ -0,0 +1,65 @@
+from dataclasses import replace
+from typing import AsyncIterable, AsyncIterator, Callable, Union
+
+from nvelope import JSON
+
+from nomaj.body import BodyFromIterable
+from nomaj.misc.dumps import DumpsStd
+from nomaj.nomaj import Resp
+from nomaj.rs.rs_with_type import rs_with_type
+
+_DUMPS: Callable[[JSON], Union[str, bytes]] = DumpsStd()
+
+
+def rs_json_stream(
+    items: AsyncIterable[JSON],
+    rs: Resp = Resp(status=200),
+    dumps: Callable[[JSON], Union[str, bytes]] = _DUMPS,
+    chunk: int = 64 * 1024,
+    ndjson: bool = False,
+) -> Resp:
+    """
+    Response streaming the items as a JSON array or newline-delimited JSON.
+
+    Items are encoded as they come and sent in chunks of at least ``chunk``
+    bytes (except for the last one). Since the status is sent before
+    the items are encoded, an encoding error aborts the response.
+
+    :param items: items to stream
+    :param rs: response to put the body into
+    :param dumps: JSON encoder
+    :param chunk: minimum size of a sent chunk in bytes
+    :param ndjson: stream newline-delimited JSON instead of an array
+    """
+    return rs_with_type(
+        replace(
+            rs,
+            body=BodyFromIterable(_encoded(items, dumps, chunk, ndjson)),
+        ),
+        "application/x-ndjson" if ndjson else "application/json",
+    )
+
+
+async def _encoded(
+    items: AsyncIterable[JSON],
+    dumps: Callable[[JSON], Union[str, bytes]],
+    chunk: int,
+    ndjson: bool,
+) -> AsyncIterator[bytes]:
+    buff = bytearray() if ndjson else bytearray(b"[")
+    first = True
+    async for item in items:
+        if not (ndjson or first):
+            buff.extend(b",")
+        first = False
+        encoded = dumps(item)
+        buff.extend(encoded if isinstance(encoded, bytes) else encoded.encode())
+        if ndjson:
+            buff.extend(b"\n")
+        if len(buff) >= chunk:
+            yield bytes(buff)
+            buff.clear()
+    if not ndjson:
+        buff.extend(b"]")
+    if buff:
+        yield bytes(buff)
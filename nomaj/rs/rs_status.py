@@ -0,0 +1,88 @@
+import http.client
+from typing import Dict, List, Tuple, Optional, NamedTuple
+
+from multidict import CIMultiDictProxy, CIMultiDict, MultiMapping
+
+from nomaj.body import EmptyBody, BodyOf
+from nomaj.nomaj import Resp
+
+
+class _Prebuilt(NamedTuple):
+    empty: Resp
+    text: Resp
+    text_bytes: bytes
+
+
+_TABLE: Dict[int, _Prebuilt] = {}
+_ENCODED: Dict[int, Tuple[MultiMapping[str], int, int, List[Tuple[bytes, bytes]]]] = {}
+
+
+def rs_status(status: int) -> Resp:
+    """
+    Prebuilt response of the status with no body.
+    The same immutable instance is returned for the same status.
+    """
+    return _prebuilt(status).empty
+
+
+def rs_status_text(status: int) -> Resp:
+    """
+    Response of the status with a plain text body like ``404 Not Found``.
+    Headers and body bytes are prebuilt, only the body reader is new.
+    """
+    pb = _prebuilt(status)
+    return Resp(pb.text.status, pb.text.headers, BodyOf(pb.text_bytes))
+
+
+def asgi_headers(
+    resp: Resp, size: Optional[int]
+) -> Optional[List[Tuple[bytes, bytes]]]:
+    """
+    Pre-encoded ASGI headers (``Content-Length`` included) of a response
+    built by ``rs_status`` or ``rs_status_text``.
+
+    :param resp: response to be sent
+    :param size: size of its body
+    :returns: a new list of the encoded headers or ``None`` if the response
+        is not a prebuilt one (or has been altered)
+    """
+    entry = _ENCODED.get(id(resp.headers))
+    if (
+        entry is None
+        or entry[0] is not resp.headers
+        or entry[1] != resp.status
+        or entry[2] != size
+    ):
+        return None
+    return list(entry[3])
+
+
+def _prebuilt(status: int) -> _Prebuilt:
+    pb = _TABLE.get(status)
+    if pb is None:
+        assert status in range(100, 1000)
+        text = f"{status} {http.client.responses.get(status, '')}".strip().encode()
+        empty = Resp(status, CIMultiDictProxy(CIMultiDict()), EmptyBody())
+        typed = Resp(
+            status,
+            CIMultiDictProxy(CIMultiDict({"Content-Type": "text/plain"})),
+            BodyOf(text),
+        )
+        pb = _Prebuilt(empty, typed, text)
+        _register(empty, 0)
+        _register(typed, len(text))
+        _TABLE[status] = pb
+    return pb
+
+
+def _register(resp: Resp, size: int) -> None:
+    headers = [
+        (name.lower().encode(), value.encode()) for name, value in resp.headers.items()
+    ]
+    if resp.status >= 200 and resp.status not in (204, 304):
+        headers.append((b"content-length", str(size).encode()))
+    _ENCODED[id(resp.headers)] = (resp.headers, resp.status, size, headers)
+
+
+for _status in http.client.responses:
+    _prebuilt(int(_status))
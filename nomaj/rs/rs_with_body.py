@@ -8,11 +8,12 @@ from nomaj.nomaj import Resp
 def rs_with_body(
     resp: Resp, body: Union[Body, str, bytes, AsyncIterable[bytes]]
 ) -> Resp:
-    new_body: Body
+    return dataclasses.replace(resp, body=body_of(body))
+
+
+def body_of(body: Union[Body, str, bytes, AsyncIterable[bytes]]) -> Body:
     if isinstance(body, (str, bytes)):
-        new_body = BodyOf(body)
+        return BodyOf(body)
     elif isinstance(body, Body):
-        new_body = body
-    else:
-        new_body = BodyFromIterable(body.__aiter__())
-    return dataclasses.replace(resp, body=new_body)
+        return body
+    return BodyFromIterable(body.__aiter__())
@@ -3,6 +3,10 @@ from nomaj.rs.rs_with_headers import rs_with_headers
 
 
 def rs_with_cookie(rs: Resp, name: str, value: str, *attrs: str) -> Resp:
+    return rs_with_headers(rs, [("Set-Cookie", set_cookie(name, value, *attrs))])
+
+
+def set_cookie(name: str, value: str, *attrs: str) -> str:
     base: str = f"{name}={value};"
     attributes: str = ";".join(attrs) + ";"
-    return rs_with_headers(rs, [("Set-Cookie", f"{base}{attributes}")])
+    return f"{base}{attributes}"